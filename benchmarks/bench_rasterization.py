@@ -0,0 +1,70 @@
+"""Compara páginas/segundo entre a rasterização antiga (um pdftoppm por página)
+e o motor de rasterização por blocos de páginas de conversor.py.
+
+Uso:
+    python benchmarks/bench_rasterization.py caminho/para/documento.pdf --pages 50 --dpi 200
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz  # PyMuPDF
+from pdf2image import convert_from_bytes
+
+from conversor import _page_chunks, _render_page_range
+
+
+def _legacy_per_page(pdf_bytes, total_pages, dpi, source):
+    """Caminho original: uma chamada ao poppler (e um parse completo do PDF) por página."""
+    for page_num in range(1, total_pages + 1):
+        convert_from_bytes(pdf_bytes, dpi=dpi, first_page=page_num, last_page=page_num)
+
+
+def _chunked(engine):
+    def run(pdf_bytes, total_pages, dpi, source):
+        for first, last in _page_chunks(total_pages):
+            for _ in _render_page_range(source, first, last, dpi, engine):
+                pass
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pdf', help='PDF usado no benchmark')
+    parser.add_argument('--pages', type=int, default=None, help='Limita o número de páginas renderizadas')
+    parser.add_argument('--dpi', type=int, default=200)
+    args = parser.parse_args()
+
+    with open(args.pdf, 'rb') as f:
+        pdf_bytes = f.read()
+    with fitz.open(stream=pdf_bytes, filetype='pdf') as doc:
+        total_pages = doc.page_count
+    if args.pages:
+        total_pages = min(total_pages, args.pages)
+
+    # O benchmark roda no próprio processo, que faz o papel de worker
+    stat = os.stat(args.pdf)
+    source = ('path', os.path.abspath(args.pdf), stat.st_mtime_ns, stat.st_size)
+
+    candidates = [
+        ('poppler por página (antigo)', _legacy_per_page),
+        ('poppler por bloco', _chunked('poppler')),
+        ('fitz por bloco', _chunked('fitz')),
+    ]
+
+    print(f"{os.path.basename(args.pdf)}: {total_pages} páginas a {args.dpi} DPI (processo único)")
+    baseline = None
+    for name, func in candidates:
+        start = time.perf_counter()
+        func(pdf_bytes, total_pages, args.dpi, source)
+        elapsed = time.perf_counter() - start
+        rate = total_pages / elapsed if elapsed else float('inf')
+        baseline = baseline or rate
+        print(f"  {name:<28} {elapsed:8.2f} s  {rate:8.2f} páginas/s  ({rate / baseline:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
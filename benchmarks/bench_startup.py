@@ -0,0 +1,146 @@
+"""Mede o tempo de inicialização (importação a frio) de cada ponto de entrada do projeto.
+
+Cada cenário roda em um processo Python novo com `-X importtime`; o tempo reportado é a soma dos
+tempos próprios de todos os módulos importados, e o menor valor entre as repetições é o que conta.
+Os cenários de "primeiro uso" chamam a conversão de verdade em um PDF pequeno gerado pelo próprio
+benchmark, de modo que contam as importações feitas dentro das funções. Eles fixam o pool em um
+worker: as importações do servidor forkserver e do worker entram na soma (o -X importtime vale
+para eles também) e, assim, não variam com o número de núcleos da máquina.
+Os resultados são comparados com benchmarks/startup_baseline.json (versionado): um cenário que
+ficar mais lento que a linha de base além da tolerância, ou sem linha de base, falha (código de
+saída 1). A linha de base só é regravada com --update-baseline.
+
+Uso:
+    python benchmarks/bench_startup.py                     # mede e compara com a linha de base
+    python benchmarks/bench_startup.py --update-baseline   # grava as medições como nova linha de base
+    python benchmarks/bench_startup.py --top 15            # mostra os módulos mais caros de cada cenário
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(ROOT, 'benchmarks', 'startup_baseline.json')
+
+# Cenário -> código executado em um interpretador novo ({pdf}: PDF de exemplo, {out}: pasta de saída)
+_FIRST_USE = ("import conversor; conversor.set_global_base_drive_path({out!r}); conversor.set_cache_options(enabled=False); "
+              "conversor.set_worker_pool_size(1); ")
+# A aplicação web cria as pastas na pasta base ao ser importada; o despachante de jobs é anulado
+# para que só a importação seja medida (o túnel do ngrok só abre em app.run)
+_WEB_APP = ("import conversor; conversor.set_global_base_drive_path({out!r}); "
+            "import jobs; jobs.start_dispatcher = lambda *args, **kwargs: None; import app")
+# A CLI até o argparse: main.py executado como script com --help
+_MAIN_CLI = "import runpy, sys; sys.argv = ['main.py', '--help']; runpy.run_path('main.py', run_name='__main__')"
+SCENARIOS = {
+    'conversor': "import conversor",
+    'utils': "import utils",
+    'web_jobs': "import jobs",
+    'web_app': _WEB_APP,
+    'main.py --help': _MAIN_CLI,
+    'split_pdf (primeiro uso)': _FIRST_USE + "conversor.split_pdf({pdf!r})",
+    'pdf_to_excel (primeiro uso)': _FIRST_USE + "conversor.pdf_to_excel({pdf!r})",
+}
+
+def write_sample_pdf(path, pages=2):
+    """Write a minimal text-only PDF (no PDF library needed), with a valid xref table."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>",
+               f"<< /Type /Pages /Kids [{' '.join(f'{3 + 2 * i} 0 R' for i in range(pages))}] /Count {pages} >>"]
+    font = 3 + 2 * pages
+    for i in range(pages):
+        content = f"BT /F1 12 Tf 72 720 Td (Pagina {i + 1}) Tj ET"
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * i} 0 R /Resources << /Font << /F1 {font} 0 R >> >> >>")
+        objects.append(f"<< /Length {len(content)} >>\nstream\n{content}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(data))
+        data += f"{number} 0 obj\n{body}\nendobj\n".encode('latin-1')
+    xref = len(data)
+    data += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode('latin-1')
+    data += b"".join(f"{offset:010d} 00000 n \n".encode('latin-1') for offset in offsets)
+    data += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode('latin-1')
+    with open(path, 'wb') as f:
+        f.write(data)
+
+_IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def measure(code):
+    """Run code in a fresh interpreter with -X importtime; returns (total_ms, {module: cumulative_ms})."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT, os.path.join(ROOT, 'web_converter'), os.environ.get('PYTHONPATH', '')]))
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True, env=env, cwd=ROOT)
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else f"código de saída {completed.returncode}")
+    total_us = 0
+    modules = {}
+    for line in completed.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            total_us += int(match.group(1))
+            modules[match.group(4)] = int(match.group(2)) / 1000
+    return total_us / 1000, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='Repetições por cenário (vale a menor)')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Piora relativa aceita antes de acusar regressão')
+    parser.add_argument('--top', type=int, default=0, help='Mostra os N módulos com maior tempo acumulado')
+    parser.add_argument('--update-baseline', action='store_true', help='Grava as medições como nova linha de base')
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    results = {}
+    regressions = []
+    work_dir = tempfile.mkdtemp(prefix='bench_startup_')
+    sample_pdf = os.path.join(work_dir, 'exemplo.pdf')
+    write_sample_pdf(sample_pdf)
+    print(f"Python {sys.version.split()[0]} — menor de {args.repeat} execuções por cenário")
+    for name, template in SCENARIOS.items():
+        code = template.format(pdf=sample_pdf, out=work_dir)
+        try:
+            runs = [measure(code) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"  {name:<28} ❌ falhou: {e}")
+            regressions.append(name)
+            continue
+        total_ms, modules = min(runs, key=lambda run: run[0])
+        results[name] = round(total_ms, 1)
+
+        line = f"  {name:<28} {total_ms:9.1f} ms"
+        if name in baseline:
+            change = (total_ms - baseline[name]) / baseline[name] if baseline[name] else 0.0
+            line += f"  (linha de base {baseline[name]:.1f} ms, {change:+.0%})"
+            if change > args.tolerance:
+                regressions.append(name)
+                line += "  ⚠️ regressão"
+        elif not args.update_baseline:
+            regressions.append(name)
+            line += "  ⚠️ sem linha de base (rode com --update-baseline)"
+        print(line)
+        for module, cumulative_ms in sorted(modules.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"      {cumulative_ms:9.1f} ms  {module}")
+
+    shutil.rmtree(work_dir, ignore_errors=True)
+    if args.update_baseline:
+        with open(BASELINE_PATH, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        print(f"Linha de base gravada em {BASELINE_PATH}")
+    elif regressions:
+        print(f"❌ Regressão de inicialização (ou cenário sem linha de base) em: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
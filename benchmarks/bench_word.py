@@ -0,0 +1,53 @@
+"""Mede como a conversão PDF -> Word (pdf2docx) escala com o número de processos.
+
+Uso:
+    python benchmarks/bench_word.py caminho/para/documento.pdf --cores 1 2 4 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz  # PyMuPDF
+
+from conversor import _convert_to_docx, set_worker_pool_size, shutdown_worker_pool
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pdf', help='PDF usado no benchmark')
+    parser.add_argument('--cores', type=int, nargs='+', default=None,
+                        help='Números de processos a medir (padrão: 1, 2, 4, ... até os núcleos da máquina)')
+    args = parser.parse_args()
+
+    cores = args.cores
+    if not cores:
+        cores, count = [], 1
+        while count < (os.cpu_count() or 1):
+            cores.append(count)
+            count *= 2
+        cores.append(os.cpu_count() or 1)
+
+    with fitz.open(args.pdf) as doc:
+        total_pages = doc.page_count
+
+    print(f"{os.path.basename(args.pdf)}: {total_pages} páginas")
+    baseline = None
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for cpu_count in cores:
+            output_path = os.path.join(temp_dir, f"saida_{cpu_count}.docx")
+            set_worker_pool_size(cpu_count)
+            start = time.perf_counter()
+            _convert_to_docx(args.pdf, output_path, cpu_count)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            rate = total_pages / elapsed if elapsed else float('inf')
+            print(f"  {cpu_count:>3} processo(s) {elapsed:8.2f} s  {rate:8.2f} páginas/s  ({baseline / elapsed:.1f}x)")
+    shutdown_worker_pool()
+
+
+if __name__ == '__main__':
+    main()
@@ -3,21 +3,30 @@ import io
 import zipfile
 import shutil
 import re
+import html
+import json
+import logging
+import mmap
+import time
+import hashlib
+import sqlite3
+import inspect
+import functools
+import itertools
+import atexit
+import threading
 import warnings
-from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
 from tqdm.auto import tqdm
 
-# PDF Libraries
-import PyPDF2
-from pdf2docx import Converter
-import pdfplumber
-from pdf2image import convert_from_bytes # Changed from convert_from_path for parallel processing
-import pytesseract
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-import fitz  # PyMuPDF
-from PIL import Image
-import pandas as pd
+# As bibliotecas de PDF (PyMuPDF, pdfplumber, pdf2docx, pdf2image, pytesseract, reportlab, PIL e
+# pandas) são importadas dentro das funções que as usam: carregar o conversor, a aplicação web ou
+# um worker não paga o custo de bibliotecas que a conversão pedida não usa.
 
 warnings.filterwarnings('ignore')
 
@@ -31,58 +40,1551 @@ def set_global_base_drive_path(path):
 def get_base_drive_path():
     return GLOBAL_BASE_DRIVE_PATH
 
+def _output_dir(output_dir=None):
+    """Destination folder of a conversion (created if missing): output_dir when given, else <base>/output_files."""
+    path = output_dir or os.path.join(get_base_drive_path(), "output_files")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+# ==================== MOTOR DE RASTERIZAÇÃO ====================
+# 'fitz' renderiza com PyMuPDF a partir de um único documento aberto por bloco de páginas.
+# 'poppler' usa pdf2image, com uma única chamada ao pdftoppm por bloco de páginas.
+RASTER_ENGINE = 'fitz'
+PAGES_PER_TASK = 8
+
+def set_raster_engine(engine):
+    global RASTER_ENGINE
+    if engine not in ('fitz', 'poppler'):
+        raise ValueError(f"Motor de rasterização desconhecido: {engine}")
+    RASTER_ENGINE = engine
+
+def get_raster_engine():
+    return RASTER_ENGINE
+
+def _page_chunks(total_pages, chunk_size=None):
+    """Split 1-based page numbers into (first_page, last_page) ranges."""
+    chunk_size = chunk_size or PAGES_PER_TASK
+    return [(first, min(first + chunk_size - 1, total_pages)) for first in range(1, total_pages + 1, chunk_size)]
+
+def _consecutive_runs(page_numbers):
+    """Group sorted page numbers into (first, last) runs of consecutive pages."""
+    runs = []
+    for page_num in page_numbers:
+        if runs and runs[-1][1] == page_num - 1:
+            runs[-1][1] = page_num
+        else:
+            runs.append([page_num, page_num])
+    return [tuple(run) for run in runs]
+
+def _chunk_pages(page_numbers, chunk_size=None):
+    """Split sorted page numbers into (first_page, last_page) ranges of consecutive pages,
+    each at most chunk_size pages long."""
+    chunk_size = chunk_size or PAGES_PER_TASK
+    chunks = []
+    for first, last in _consecutive_runs(page_numbers):
+        chunks.extend((start, min(start + chunk_size - 1, last)) for start in range(first, last + 1, chunk_size))
+    return chunks
+
+def _to_bilevel(image, threshold=128):
+    """Threshold a PIL image to 1-bit (no dithering: crisp text for OCR and Flate/PNG)."""
+    return image.convert('L').point(lambda value: 255 if value >= threshold else 0).convert('1')
+
+def _render_page_range(source, first_page, last_page, dpi, engine='fitz', colorspace='rgb', max_dim=None):
+    """Yield (page_num, image) for a page range of a shared document.
+
+    colorspace is 'rgb', 'gray' or 'mono'; gray pages are rendered with one channel directly.
+    With max_dim (fitz only) a page is rendered at a lower resolution when dpi would make its
+    longest side larger than max_dim pixels. image is None when a single page fails to render,
+    so callers can report it and move on.
+    """
+    if engine == 'poppler':
+        from pdf2image import convert_from_bytes, convert_from_path
+        grayscale = colorspace != 'rgb'
+        if source[0] == 'path':
+            images = convert_from_path(source[1], dpi=dpi, first_page=first_page, last_page=last_page, grayscale=grayscale)
+        else:
+            images = convert_from_bytes(_worker_pdf_bytes(source), dpi=dpi, first_page=first_page, last_page=last_page, grayscale=grayscale)
+        for offset, image in enumerate(images):
+            yield first_page + offset, _to_bilevel(image) if colorspace == 'mono' else image
+        return
+
+    import fitz
+    from PIL import Image
+    doc = _worker_document(source)
+    pixmap_colorspace = fitz.csRGB if colorspace == 'rgb' else fitz.csGRAY
+    for page_num in range(first_page, last_page + 1):
+        try:
+            page = doc[page_num - 1]
+            zoom = dpi / 72
+            if max_dim:
+                zoom = min(zoom, max_dim / max(page.rect.width, page.rect.height, 1))
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=pixmap_colorspace, alpha=False)
+            image = Image.frombytes('RGB' if colorspace == 'rgb' else 'L', (pix.width, pix.height), pix.samples)
+            yield page_num, _to_bilevel(image) if colorspace == 'mono' else image
+        except Exception as e:
+            print(f"❌ Erro ao renderizar página {page_num}: {str(e)}")
+            yield page_num, None
+
+# ==================== PERFIS DE RENDERIZAÇÃO ====================
+# Um perfil define como as páginas são rasterizadas e gravadas: DPI, espaço de cor ('rgb',
+# 'gray' ou 'mono'), formato ('jpeg', 'png' ou 'webp'), qualidade e tamanhos. sizes lista as
+# versões geradas de cada página a partir de uma única renderização: None é a imagem no DPI do
+# perfil e um número é o lado maior, em pixels, de uma miniatura. Perfis só com miniaturas são
+# renderizados direto na resolução necessária. Um perfil pode ser passado pelo nome ou como
+# dicionário com os campos que mudam em relação ao 'default'.
+RENDER_PROFILES = {
+    'default': {'dpi': 200, 'colorspace': 'rgb', 'format': 'jpeg', 'quality': 95, 'sizes': (None,)},
+    'print': {'dpi': 300, 'colorspace': 'rgb', 'format': 'png', 'quality': None, 'sizes': (None,)},
+    'web': {'dpi': 150, 'colorspace': 'rgb', 'format': 'webp', 'quality': 80, 'sizes': (None, 320)},
+    'thumbnail': {'dpi': 72, 'colorspace': 'rgb', 'format': 'jpeg', 'quality': 80, 'sizes': (256,)},
+    'gray': {'dpi': 200, 'colorspace': 'gray', 'format': 'png', 'quality': None, 'sizes': (None,)},
+    'mono': {'dpi': 300, 'colorspace': 'mono', 'format': 'png', 'quality': None, 'sizes': (None,)},
+    'ocr': {'dpi': 300, 'colorspace': 'gray', 'format': 'png', 'quality': None, 'sizes': (None,)},
+}
+_IMAGE_EXTENSIONS = {'jpeg': 'jpg', 'png': 'png', 'webp': 'webp'}
+
+def get_render_profile(profile='default'):
+    """Retorna o perfil de renderização completo (nome de RENDER_PROFILES ou dicionário com ajustes)"""
+    if isinstance(profile, str):
+        if profile not in RENDER_PROFILES:
+            raise ValueError(f"Perfil de renderização desconhecido: {profile} (use um de {', '.join(RENDER_PROFILES)})")
+        resolved = dict(RENDER_PROFILES[profile])
+    else:
+        resolved = {**RENDER_PROFILES['default'], **dict(profile or {})}
+    if resolved['colorspace'] not in ('rgb', 'gray', 'mono'):
+        raise ValueError(f"Espaço de cor desconhecido: {resolved['colorspace']}")
+    if resolved['format'] not in _IMAGE_EXTENSIONS:
+        raise ValueError(f"Formato de imagem desconhecido: {resolved['format']}")
+    resolved['sizes'] = tuple(sorted(set(resolved['sizes'] or (None,)), key=lambda size: -(size or float('inf'))))
+    return resolved
+
+def _render_max_dim(profile):
+    """Largest pixel size a profile needs, or None when the full-DPI image is among its outputs."""
+    return None if None in profile['sizes'] else max(profile['sizes'])
+
+def _encode_rendered(image, profile):
+    """Encode a rendered page in the profile's format."""
+    buffer = io.BytesIO()
+    if profile['format'] != 'png' and image.mode == '1':
+        image = image.convert('L')  # JPEG e WebP não têm modo de 1 bit
+    if profile['format'] == 'png':
+        image.save(buffer, 'PNG', optimize=True)
+    else:
+        image.save(buffer, profile['format'].upper(), quality=profile['quality'] or 90)
+    return buffer.getvalue()
+
+def _page_renders(image, profile):
+    """Encode every size of a profile from one rendered image: {label: bytes}, label 'full' or '<N>'.
+
+    Sizes are produced largest first, each thumbnail downscaled from the previous one.
+    """
+    from PIL import Image
+    renders = {}
+    current = image
+    for size in profile['sizes']:
+        if size is None:
+            renders['full'] = _encode_rendered(image, profile)
+            continue
+        if max(current.size) > size:
+            current = current.copy()
+            current.thumbnail((size, size), Image.LANCZOS)
+        renders[str(size)] = _encode_rendered(current, profile)
+    return renders
+
+def _render_name(page_num, label, profile):
+    """Archive name of one page render: pagina_N.ext, or <size>px/pagina_N.ext for thumbnails."""
+    name = f"pagina_{page_num}.{_IMAGE_EXTENSIONS[profile['format']]}"
+    return name if label == 'full' else f"{label}px/{name}"
+
+def _pack_renders(renders):
+    """Serialize {label: bytes} into one checkpoint blob (JSON header line + concatenated data)."""
+    header = json.dumps([[label, len(data)] for label, data in renders.items()]).encode('utf-8')
+    return header + b'\n' + b''.join(renders.values())
+
+def _unpack_renders(blob):
+    header, _, data = bytes(blob).partition(b'\n')
+    renders, offset = {}, 0
+    for label, length in json.loads(header):
+        renders[label] = data[offset:offset + length]
+        offset += length
+    return renders
+
+# ==================== COMPARTILHAMENTO DO DOCUMENTO COM OS WORKERS ====================
+# O PDF nunca é serializado nas tarefas: cada tarefa leva apenas um descritor pequeno da
+# origem do documento e um intervalo de páginas. Cada worker abre o documento uma vez e o
+# mantém em cache para as tarefas seguintes.
+#   'path' - cada worker abre o arquivo pelo caminho (padrão, sem cópia entre processos)
+#   'shm'  - o conteúdo é copiado uma vez para memória compartilhada (multiprocessing.shared_memory)
+#   'mmap' - cada worker mapeia o arquivo em memória
+# Em 'shm' e 'mmap' o PyMuPDF lê direto do buffer compartilhado: os workers não fazem cópias.
+DOCUMENT_SHARING = 'path'
+
+# Documentos abertos mantidos por worker (descritor -> (documento fitz, memoryview, shm ou mmap))
+WORKER_DOCUMENT_CACHE_SIZE = 4
+_WORKER_DOCS = OrderedDict()
+
+def set_document_sharing(mode):
+    global DOCUMENT_SHARING
+    if mode not in ('path', 'shm', 'mmap'):
+        raise ValueError(f"Modo de compartilhamento desconhecido: {mode}")
+    DOCUMENT_SHARING = mode
+
+@contextmanager
+def _shared_document(pdf_path, mode=None):
+    """Publish pdf_path for the workers and yield the source descriptor carried by each task."""
+    mode = mode or DOCUMENT_SHARING
+    pdf_path = os.path.abspath(pdf_path)
+    if mode != 'shm':
+        # mtime e tamanho fazem parte do descritor: um arquivo substituído no mesmo caminho
+        # (ex.: input_pdfs/ entre iterações do menu) não reaproveita o documento em cache
+        stat = os.stat(pdf_path)
+        yield (mode, pdf_path, stat.st_mtime_ns, stat.st_size)
+        return
+
+    size = os.path.getsize(pdf_path)
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    try:
+        with open(pdf_path, 'rb') as f:
+            f.readinto(shm.buf[:size])
+        yield ('shm', shm.name, size)
+    finally:
+        shm.close()
+        shm.unlink()
+
+def _worker_pdf_bytes(source):
+    """Return the shared document as a memoryview over the shared buffer (poppler, pdfplumber)."""
+    return _open_worker_source(source)[1]
+
+def _worker_document(source):
+    """Return this worker's open fitz document for source, opening it on first use."""
+    return _open_worker_source(source)[0]
+
+def _open_worker_source(source):
+    import fitz
+    entry = _WORKER_DOCS.get(source)
+    if entry is not None:
+        _WORKER_DOCS.move_to_end(source)
+        return entry
+
+    kind = source[0]
+    data = handle = None
+    if kind == 'shm':
+        try:
+            # track=False (Python 3.13+) evita que o worker remova o segmento ao encerrar
+            handle = shared_memory.SharedMemory(name=source[1], track=False)
+        except TypeError:
+            handle = shared_memory.SharedMemory(name=source[1])
+        data = handle.buf[:source[2]]
+    elif kind == 'mmap':
+        with open(source[1], 'rb') as f:
+            handle = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        data = memoryview(handle)
+    if data is not None:
+        # O PyMuPDF lê direto do buffer compartilhado: nenhuma cópia privada do PDF por worker
+        doc = fitz.open(stream=data, filetype='pdf')
+    else:
+        doc = fitz.open(source[1])
+
+    _WORKER_DOCS[source] = (doc, data, handle)
+    while len(_WORKER_DOCS) > WORKER_DOCUMENT_CACHE_SIZE:
+        _close_worker_source(*_WORKER_DOCS.popitem(last=False)[1])
+    return _WORKER_DOCS[source]
+
+def _close_worker_source(doc, data, handle):
+    doc.close()
+    try:
+        if data is not None:
+            data.release()
+        if handle is not None:
+            handle.close()
+    except BufferError:
+        pass  # Ainda há uma view exportada (documento não liberado): o GC fecha depois
+
+def _close_worker_documents():
+    """Close every cached worker document and release its shared buffer."""
+    while _WORKER_DOCS:
+        _close_worker_source(*_WORKER_DOCS.popitem(last=False)[1])
+
+atexit.register(_close_worker_documents)
+
+_WORKER_PLUMBERS = OrderedDict()
+
+def _worker_plumber(source):
+    """Return this worker's open pdfplumber document for source, opening it on first use."""
+    import pdfplumber
+    pdf = _WORKER_PLUMBERS.get(source)
+    if pdf is not None:
+        _WORKER_PLUMBERS.move_to_end(source)
+        return pdf
+    if source[0] == 'path':
+        pdf = pdfplumber.open(source[1])
+    else:
+        pdf = pdfplumber.open(io.BytesIO(_worker_pdf_bytes(source)))
+    _WORKER_PLUMBERS[source] = pdf
+    while len(_WORKER_PLUMBERS) > WORKER_DOCUMENT_CACHE_SIZE:
+        _WORKER_PLUMBERS.popitem(last=False)[1].close()
+    return pdf
+
+# ==================== POOL DE WORKERS COMPARTILHADO ====================
+# Um único ProcessPoolExecutor por processo, criado no primeiro uso e reaproveitado por todas
+# as funções paralelas por página, por todos os arquivos do menu e por todas as requisições
+# da aplicação web. O custo de subir os workers (e importar as bibliotecas neles) é pago uma vez.
+WORKER_POOL_SIZE = None  # None = os.cpu_count()
+TASKS_IN_FLIGHT_PER_WORKER = 2  # Tarefas submetidas por worker além da que ele está processando
+# Como os workers são iniciados. None = 'forkserver' (ou 'spawn' onde não existir): um fork do
+# processo principal copiaria locks presos por outras threads (fila de jobs, threads de I/O,
+# tqdm) e poderia travar o worker. Quando este código roda como célula de notebook (__main__),
+# os workers só enxergam as funções por 'fork', que é usado nesse caso.
+WORKER_START_METHOD = None
+
+_WORKER_POOL = None
+_WORKER_POOL_LOCK = threading.Lock()
+
+# Verdadeiro dentro dos workers: funções paralelas chamadas ali rodam em série, sem abrir outro pool
+_IN_WORKER = False
+
+def _init_worker(settings):
+    """Pool initializer: apply the settings of the process that started the pool."""
+    global _IN_WORKER
+    _IN_WORKER = True
+    globals().update(settings)
+    warnings.filterwarnings('ignore')
+
+def set_worker_pool_size(size):
+    """Define o número de workers. O pool atual é encerrado e recriado no próximo uso."""
+    global WORKER_POOL_SIZE
+    if size is not None and size < 1:
+        raise ValueError("O pool precisa de pelo menos 1 worker")
+    WORKER_POOL_SIZE = size
+    shutdown_worker_pool()
+
+def set_worker_start_method(method):
+    """Define como os workers são iniciados ('forkserver', 'spawn', 'fork' ou None para o padrão)."""
+    global WORKER_START_METHOD
+    if method is not None and method not in multiprocessing.get_all_start_methods():
+        raise ValueError(f"Método de início desconhecido: {method}")
+    WORKER_START_METHOD = method
+    shutdown_worker_pool()
+
+def _worker_mp_context():
+    """Multiprocessing context for the shared pool (see WORKER_START_METHOD)."""
+    methods = multiprocessing.get_all_start_methods()
+    method = WORKER_START_METHOD
+    if method is None:
+        if __name__ == '__main__' and 'fork' in methods:
+            method = 'fork'
+        else:
+            method = 'forkserver' if 'forkserver' in methods else 'spawn'
+    context = multiprocessing.get_context(method)
+    if method == 'forkserver':
+        # O servidor importa este módulo uma vez; cada worker nasce dele já com o módulo carregado
+        context.set_forkserver_preload([__name__])
+    return context
+
+def get_worker_pool():
+    """Retorna o pool de workers compartilhado, iniciando-o se necessário."""
+    global _WORKER_POOL
+    with _WORKER_POOL_LOCK:
+        if _WORKER_POOL is None:
+            _WORKER_POOL = ProcessPoolExecutor(max_workers=WORKER_POOL_SIZE, initializer=_init_worker,
+                                               initargs=(_worker_settings(),), mp_context=_worker_mp_context())
+        return _WORKER_POOL
+
+def shutdown_worker_pool(wait=True):
+    """Encerra o pool de workers compartilhado (é recriado automaticamente no próximo uso)."""
+    global _WORKER_POOL
+    with _WORKER_POOL_LOCK:
+        pool, _WORKER_POOL = _WORKER_POOL, None
+    if pool is not None:
+        pool.shutdown(wait=wait, cancel_futures=True)
+
+def _iter_ordered(executor, func, items, window):
+    """Yield func(item) in input order with at most window calls submitted at a time.
+
+    Unlike executor.map, items are consumed lazily and results that are not yet wanted stay
+    bounded by the window. Closing the generator early cancels the calls not yet started.
+    """
+    pending = deque()
+    items = iter(items)
+    try:
+        for item in itertools.islice(items, window):
+            pending.append(executor.submit(func, item))
+        while pending:
+            result = pending.popleft().result()
+            for item in itertools.islice(items, 1):
+                pending.append(executor.submit(func, item))
+            yield result
+    finally:
+        for future in pending:
+            future.cancel()
+
+def _pool_map(func, tasks):
+    """Ordered map on the shared pool with a bounded number of tasks in flight.
+
+    A broken pool is discarded so the next call starts a fresh one.
+    """
+    if _IN_WORKER:
+        # O núcleo deste worker já faz parte do orçamento de CPU: não criar paralelismo aninhado
+        yield from map(func, tasks)
+        return
+    window = (WORKER_POOL_SIZE or os.cpu_count() or 1) * (1 + TASKS_IN_FLIGHT_PER_WORKER)
+    try:
+        yield from _iter_ordered(get_worker_pool(), func, tasks, window)
+    except BrokenProcessPool:
+        shutdown_worker_pool(wait=False)
+        raise
+
+atexit.register(shutdown_worker_pool)
+
+# ==================== PROGRESSO E CANCELAMENTO ====================
+# Quem dispara conversões (por exemplo, a fila de jobs da aplicação web) pode acompanhar o
+# andamento registrando um callback(etapa, concluído, total) para a thread atual. As barras de
+# progresso das conversões repassam cada atualização ao callback; se ele levantar
+# ConversionCancelled, a conversão é interrompida no ponto em que estiver.
+_PROGRESS = threading.local()
+
+class ConversionCancelled(Exception):
+    """Levantada pelo callback de progresso para interromper a conversão em andamento."""
+
+@contextmanager
+def progress_callback(callback):
+    """Registra callback(etapa, concluído, total) para as conversões executadas nesta thread"""
+    previous = getattr(_PROGRESS, 'callback', None)
+    _PROGRESS.callback = callback
+    try:
+        yield callback
+    finally:
+        _PROGRESS.callback = previous
+
+def _report_progress(stage, done, total):
+    """Forward progress to the current thread's callback, if any (may raise ConversionCancelled)."""
+    callback = getattr(_PROGRESS, 'callback', None)
+    if callback is not None:
+        callback(stage, done, total)
+
+class _progress_bar(tqdm):
+    """tqdm bar that also reports its position through _report_progress."""
+    def update(self, n=1):
+        displayed = super().update(n)
+        _report_progress(self.desc, self.n, self.total)
+        return displayed
+
+def _run_with_progress(callback, io_report, label, call):
+    """Run call() in a scheduler thread with the submitting thread's progress callback and I/O report.
+
+    The task itself is reported as stage label going from 0/1 to 1/1.
+    """
+    with progress_callback(callback), io_accounting(io_report):
+        _report_progress(label, 0, 1)
+        result = call()
+        _report_progress(label, 1, 1)
+        return result
+
+# ==================== CONTABILIDADE DE E/S ====================
+# Bytes lidos e gravados em arquivos, por categoria (entrada, saída, cache, hash, download...),
+# contados por arquivo inteiro nos pontos em que o projeto lê ou grava: as conversões contam a
+# leitura do PDF de entrada e a gravação dos arquivos gerados, o cache conta suas cópias, e assim
+# por diante. Os totais do processo ficam em get_io_report(); para medir um job ou lote isolado,
+# use io_accounting(), que também recebe o que as tarefas disparadas por run_conversions fizerem.
+_IO_LOCK = threading.Lock()
+_IO_TOTALS = {}
+_IO_CONTEXT = threading.local()
+
+def record_io(category, read=0, written=0):
+    """Registra bytes lidos/gravados em uma categoria (totais do processo e relatório da thread atual)"""
+    with _IO_LOCK:
+        for report in (_IO_TOTALS, getattr(_IO_CONTEXT, 'report', None)):
+            if report is None:
+                continue
+            entry = report.setdefault(category, {'read': 0, 'written': 0, 'operations': 0})
+            entry['read'] += read
+            entry['written'] += written
+            entry['operations'] += 1
+
+def _merge_io_report(report):
+    """Add a report collected elsewhere (e.g. in a pool worker) to this process' accounting."""
+    for category, entry in (report or {}).items():
+        with _IO_LOCK:
+            for target in (_IO_TOTALS, getattr(_IO_CONTEXT, 'report', None)):
+                if target is None:
+                    continue
+                merged = target.setdefault(category, {'read': 0, 'written': 0, 'operations': 0})
+                for field in merged:
+                    merged[field] += entry.get(field, 0)
+
+def _file_sizes(value):
+    """Total size of the files referenced by a conversion result (paths, lists, tuples)."""
+    if isinstance(value, str):
+        return os.path.getsize(value) if os.path.isfile(value) else 0
+    if isinstance(value, (list, tuple)):
+        return sum(_file_sizes(item) for item in value)
+    return 0
+
+@contextmanager
+def io_accounting(report=None):
+    """Coleta as operações de E/S feitas nesta thread (e nas tarefas que ela disparar) em um relatório"""
+    report = {} if report is None else report
+    previous = getattr(_IO_CONTEXT, 'report', None)
+    _IO_CONTEXT.report = report
+    try:
+        yield report
+    finally:
+        _IO_CONTEXT.report = previous
+
+def get_io_report():
+    """Retorna uma cópia dos totais de E/S do processo, por categoria"""
+    with _IO_LOCK:
+        return {category: dict(entry) for category, entry in _IO_TOTALS.items()}
+
+def reset_io_report():
+    with _IO_LOCK:
+        _IO_TOTALS.clear()
+
+def format_io_report(report):
+    """Resumo legível de um relatório de E/S"""
+    def megabytes(value):
+        return f"{value / (1024 * 1024):.1f} MB"
+
+    lines = []
+    for category, entry in sorted(report.items()):
+        lines.append(f"   {category:<10} lidos {megabytes(entry['read']):>10} | gravados {megabytes(entry['written']):>10} ({entry['operations']} operações)")
+    total_read = sum(entry['read'] for entry in report.values())
+    total_written = sum(entry['written'] for entry in report.values())
+    lines.append(f"   {'total':<10} lidos {megabytes(total_read):>10} | gravados {megabytes(total_written):>10}")
+    return "\n".join(lines)
+
 # ==================== FUNÇÕES AUXILIARES PARA PROCESSAMENTO PARALELO ====================
-def _convert_single_page_to_image(page_info):
-    """Helper to convert a single PDF page to an image."""
-    pdf_bytes, page_num, dpi, output_dir = page_info
+def _convert_page_range_to_images(task):
+    """Helper to render a range of PDF pages with a profile. Returns one (page_num, {label: bytes} or None) per page."""
+    source, first_page, last_page, profile, engine = task
+    results = []
     try:
-        images = convert_from_bytes(pdf_bytes, dpi=dpi, first_page=page_num, last_page=page_num)
-        if images:
-            image = images[0]
-            image_path = f"{output_dir}/pagina_{page_num}.jpg"
-            image.save(image_path, 'JPEG', quality=95)
-            return image_path
+        for page_num, image in _render_page_range(source, first_page, last_page, profile['dpi'], engine,
+                                                  profile['colorspace'], _render_max_dim(profile)):
+            results.append((page_num, None if image is None else _page_renders(image, profile)))
     except Exception as e:
-        print(f"❌ Erro ao converter página {page_num} para imagem: {str(e)}")
-    return None
-
-def _ocr_single_page(page_info):
-    """Helper to perform OCR on a single PDF page image and return text."""
-    pdf_bytes_data, page_num, dpi, lang = page_info
+        print(f"❌ Erro ao converter páginas {first_page}-{last_page} para imagem: {str(e)}")
+    # Mantém uma entrada por página para que a barra de progresso avance corretamente
+    results.extend((page_num, None) for page_num in range(first_page + len(results), last_page + 1))
+    return results
+
+def _ocr_words_and_text(image, lang):
+    """Run Tesseract once and return (words, text).
+
+    words are (x0, y0, x1, y1, word) boxes in image pixels; text is rebuilt from the same
+    result, one line per Tesseract line and a blank line between paragraphs.
+    """
+    import pytesseract
+    data = pytesseract.image_to_data(image, lang=lang, output_type=pytesseract.Output.DICT)
+    words = []
+    lines = []
+    current_line = None
+    current_par = None
+    for i, word in enumerate(data['text']):
+        word = word.strip()
+        if not word or float(data['conf'][i]) < 0:
+            continue
+        left, top = data['left'][i], data['top'][i]
+        words.append((left, top, left + data['width'][i], top + data['height'][i], word))
+
+        par_key = (data['block_num'][i], data['par_num'][i])
+        line_key = par_key + (data['line_num'][i],)
+        if line_key != current_line:
+            if current_par is not None and par_key != current_par:
+                lines.append('')
+            lines.append(word)
+            current_line, current_par = line_key, par_key
+        else:
+            lines[-1] += ' ' + word
+    return words, '\n'.join(lines)
+
+# Uma página é considerada "com texto" quando a camada de texto tem pelo menos esta quantidade
+# de caracteres; páginas sem texto e sem imagens/desenhos são consideradas vazias. Uma página
+# digitalizada com um cabeçalho ou carimbo digital ainda vai para o OCR: basta que as imagens
+# cubram pelo menos OCR_MIN_IMAGE_COVERAGE da página e o texto menos de OCR_MAX_TEXT_COVERAGE.
+OCR_MIN_TEXT_CHARS = 20
+OCR_MIN_IMAGE_COVERAGE = 0.5
+OCR_MAX_TEXT_COVERAGE = 0.15
+
+def _classify_page(page):
+    """Decide whether a fitz page needs OCR from its text-layer and image coverage.
+
+    Returns a dict with 'method' ('texto', 'ocr' or 'vazia'), the coverage ratios and, for
+    'texto' pages, the extracted text.
+    """
+    import fitz
+    page_area = abs(page.rect) or 1
+    text = page.get_text('text')
+    text_area = sum(abs(fitz.Rect(block[:4]) & page.rect) for block in page.get_text('blocks') if block[6] == 0)
+    image_area = sum(abs(fitz.Rect(info['bbox']) & page.rect) for info in page.get_image_info())
+    info = {
+        'text_chars': len(text.strip()),
+        'text_coverage': round(min(text_area / page_area, 1.0), 4),
+        'image_coverage': round(min(image_area / page_area, 1.0), 4),
+    }
+    scanned = info['image_coverage'] >= OCR_MIN_IMAGE_COVERAGE and info['text_coverage'] < OCR_MAX_TEXT_COVERAGE
+    if info['text_chars'] >= OCR_MIN_TEXT_CHARS and not scanned:
+        info['method'] = 'texto'
+        info['text'] = text
+    elif image_area or page.get_drawings():
+        info['method'] = 'ocr'
+    else:
+        info['method'] = 'vazia'
+    return info
+
+def _ocr_page_range(task):
+    """Helper to perform OCR on a range of PDF pages.
+
+    Returns one dict per page with the page text, its word boxes in PDF points, the
+    classification decision and the time spent on the page. When skip_text_pages is set, pages
+    that already have a text layer are read directly and only the others are rasterized.
+    """
+    source, first_page, last_page, dpi, lang, engine, skip_text_pages, colorspace = task
+    results = {}
+    scale = 72 / dpi
     try:
-        images = convert_from_bytes(pdf_bytes_data, dpi=dpi, first_page=page_num, last_page=page_num)
-        if images:
-            image = images[0]
-            text = pytesseract.image_to_string(image, lang=lang)
-            return f"""
---- Página {page_num} ---
-{text}
-"""
+        doc = _worker_document(source)
+        ocr_pages = []
+        for page_num in range(first_page, last_page + 1):
+            start = time.perf_counter()
+            result = {'page': page_num, 'text': '', 'words': [], 'error': None}
+            if skip_text_pages:
+                info = _classify_page(doc[page_num - 1])
+                result['text'] = info.pop('text', '')
+                result.update(info)
+            else:
+                result['method'] = 'ocr'
+            result['seconds'] = time.perf_counter() - start
+            results[page_num] = result
+            if result['method'] == 'ocr':
+                ocr_pages.append(page_num)
+
+        for run_first, run_last in _consecutive_runs(ocr_pages):
+            start = time.perf_counter()
+            for page_num, image in _render_page_range(source, run_first, run_last, dpi, engine, colorspace):
+                result = results[page_num]
+                if image is None:
+                    result['error'] = 'falha na renderização'
+                else:
+                    try:
+                        words, result['text'] = _ocr_words_and_text(image, lang)
+                        result['words'] = [(x0 * scale, y0 * scale, x1 * scale, y1 * scale, word) for x0, y0, x1, y1, word in words]
+                    except Exception as e:
+                        result['error'] = str(e)
+                now = time.perf_counter()
+                result['seconds'] += now - start
+                start = now
     except Exception as e:
+        for page_num in range(first_page, last_page + 1):
+            result = results.setdefault(page_num, {'page': page_num, 'text': '', 'words': [], 'method': 'ocr', 'seconds': 0.0, 'error': None})
+            if result['method'] == 'ocr' and not result['text'] and not result['error']:
+                result['error'] = str(e)
+    return [results[page_num] for page_num in range(first_page, last_page + 1)]
+
+def _format_ocr_page(result):
+    if result['error']:
         return f"""
---- Erro na Página {page_num} (OCR): {str(e)} ---
+--- Erro na Página {result['page']} (OCR): {result['error']} ---
 """
-    return ""
+    return f"""
+--- Página {result['page']} ---
+{result['text']}
+"""
+
+def _insert_invisible_words(page, words):
+    """Overlay OCR words on a fitz page as invisible text (render mode 3), making it searchable."""
+    import fitz
+    derotate = page.derotation_matrix
+    for x0, y0, x1, y1, word in words:
+        height = y1 - y0
+        unit_width = fitz.get_text_length(word, fontname='helv', fontsize=1)
+        fontsize = (x1 - x0) / unit_width if unit_width else height
+        # Evita fontes desproporcionais quando a caixa do Tesseract é muito estreita ou larga
+        fontsize = max(1, min(fontsize, height * 1.5)) if height > 0 else max(fontsize, 1)
+        # As caixas estão no espaço da página exibida; insert_text trabalha no espaço sem rotação
+        baseline = fitz.Point(x0, y1) * derotate
+        page.insert_text(baseline, word, fontsize=fontsize, fontname='helv', render_mode=3, rotate=page.rotation)
+
+def _analyze_page_range(task):
+    """Helper for convert_all: parse each page once and produce every per-page output requested.
+
+    Text and tables come from the same pdfplumber page; the page is rasterized once, at the
+    highest DPI needed, and downsampled for the JPEG output when OCR needed a higher DPI. OCR
+    gets a grayscale (or bilevel) copy following the 'ocr' render profile.
+    """
+    from PIL import Image
+    source, first_page, last_page, options = task
+    doc = _worker_document(source)
+    plumber = _worker_plumber(source) if options['text'] or options['tables'] else None
+    images_dpi = options['images_dpi']
+    ocr_dpi = options['ocr_dpi']
+    results = []
+    for page_num in range(first_page, last_page + 1):
+        result = {'page': page_num, 'text': '', 'tables': [], 'image': None, 'ocr': None, 'error': None}
+        try:
+            if plumber is not None:
+                page = plumber.pages[page_num - 1]
+                if options['text']:
+                    result['text'] = page.extract_text(x_tolerance=1) or ''
+                if options['tables']:
+                    result['tables'] = [table for table in page.extract_tables() if table]
+                page.flush_cache()
+
+            ocr = None
+            if ocr_dpi:
+                start = time.perf_counter()
+                ocr = {'page': page_num, 'text': '', 'words': [], 'error': None}
+                if options['skip_text_pages']:
+                    info = _classify_page(doc[page_num - 1])
+                    ocr['text'] = info.pop('text', '')
+                    ocr.update(info)
+                else:
+                    ocr['method'] = 'ocr'
+                result['ocr'] = ocr
+
+            needs_ocr = ocr is not None and ocr['method'] == 'ocr'
+            render_dpi = max(images_dpi or 0, ocr_dpi if needs_ocr else 0)
+            if render_dpi:
+                _, image = next(_render_page_range(source, page_num, page_num, render_dpi, options['engine']))
+                if image is None:
+                    raise RuntimeError('falha na renderização')
+                if needs_ocr:
+                    try:
+                        scale = 72 / render_dpi  # A página pode ter sido renderizada no DPI das imagens
+                        ocr_image = image
+                        if options['ocr_colorspace'] == 'gray':
+                            ocr_image = image.convert('L')
+                        elif options['ocr_colorspace'] == 'mono':
+                            ocr_image = _to_bilevel(image)
+                        words, ocr['text'] = _ocr_words_and_text(ocr_image, options['lang'])
+                        ocr['words'] = [(x0 * scale, y0 * scale, x1 * scale, y1 * scale, word) for x0, y0, x1, y1, word in words]
+                    except Exception as e:
+                        ocr['error'] = str(e)
+                if images_dpi:
+                    if render_dpi != images_dpi:
+                        factor = images_dpi / render_dpi
+                        image = image.resize((max(1, round(image.width * factor)), max(1, round(image.height * factor))), Image.LANCZOS)
+                    buffer = io.BytesIO()
+                    image.save(buffer, 'JPEG', quality=options['images_quality'])
+                    result['image'] = buffer.getvalue()
+            if ocr is not None:
+                ocr['seconds'] = time.perf_counter() - start
+        except Exception as e:
+            result['error'] = str(e)
+            if result['ocr'] is not None and not result['ocr']['error']:
+                result['ocr']['error'] = str(e)
+        results.append(result)
+    return results
+
+def _extract_tables_page_range(task):
+    """Helper to extract the tables of a range of pages. Returns (page_num, table_index, rows) tuples."""
+    source, first_page, last_page = task
+    pdf = _worker_plumber(source)
+    tables = []
+    for page_num in range(first_page, last_page + 1):
+        page = pdf.pages[page_num - 1]
+        try:
+            for table_index, table in enumerate(page.extract_tables()):
+                if table:
+                    tables.append((page_num, table_index + 1, table))
+        except Exception as e:
+            print(f"❌ Erro ao extrair tabelas da página {page_num}: {str(e)}")
+        finally:
+            page.flush_cache()
+    return tables
+
+def _extract_text_page_range(task):
+    """Helper to extract the text of a range of pages, once per page. Returns (page_num, text) tuples."""
+    source, first_page, last_page, backend = task
+    results = []
+    if backend == 'fitz':
+        doc = _worker_document(source)
+        for page_num in range(first_page, last_page + 1):
+            results.append((page_num, doc[page_num - 1].get_text('text')))
+        return results
+
+    pdf = _worker_plumber(source)
+    for page_num in range(first_page, last_page + 1):
+        page = pdf.pages[page_num - 1]
+        results.append((page_num, page.extract_text(x_tolerance=1) or '')) # x_tolerance para melhor fusão de texto
+        page.flush_cache()
+    return results
+
+def _html_page_range(task):
+    """Helper to build the HTML of a range of pages.
+
+    Returns (page_num, content, image_bytes) tuples, where content is the page text, or
+    (width, height, spans) when layout is requested, and image_bytes is a JPEG preview or None.
+    """
+    source, first_page, last_page, layout, image_dpi, engine = task
+    doc = _worker_document(source)
+    images = {}
+    if image_dpi:
+        for page_num, image in _render_page_range(source, first_page, last_page, image_dpi, engine):
+            if image is not None:
+                buffer = io.BytesIO()
+                image.save(buffer, 'JPEG', quality=80)
+                images[page_num] = buffer.getvalue()
+
+    results = []
+    for page_num in range(first_page, last_page + 1):
+        page = doc[page_num - 1]
+        if layout:
+            spans = []
+            for block in page.get_text('dict')['blocks']:
+                for line in block.get('lines', []):
+                    for span in line['spans']:
+                        if span['text'].strip():
+                            x0, y0 = span['bbox'][:2]
+                            spans.append((x0, y0, span['size'], span['text']))
+            content = (page.rect.width, page.rect.height, spans)
+        else:
+            content = page.get_text('text')
+        results.append((page_num, content, images.get(page_num)))
+    return results
+
+def _extract_image_xrefs(task):
+    """Helper to decode embedded images by xref. Returns (xref, ext, sha256, image_bytes) tuples."""
+    source, xrefs = task
+    doc = _worker_document(source)
+    results = []
+    for xref in xrefs:
+        try:
+            base_image = doc.extract_image(xref)
+            image_bytes = base_image["image"]
+            results.append((xref, base_image["ext"], hashlib.sha256(image_bytes).hexdigest(), image_bytes))
+        except Exception as e:
+            print(f"❌ Erro ao extrair imagem (xref {xref}): {str(e)}")
+    return results
+
+def _split_parts(task):
+    """Helper to build split parts from the shared document. Returns (name, pdf_bytes) tuples."""
+    import fitz
+    source, parts = task
+    doc = _worker_document(source)
+    results = []
+    for name, first_page, last_page in parts:
+        part = fitz.open()
+        try:
+            part.insert_pdf(doc, from_page=first_page - 1, to_page=last_page - 1)
+            results.append((name, part.tobytes(garbage=3, deflate=True)))
+        finally:
+            part.close()
+    return results
+
+def _encode_compressed_image(image, image_format, quality):
+    """Encode a PIL image for compress_pdf. Returns image bytes in the requested format."""
+    buffer = io.BytesIO()
+    if image_format == 'bilevel' and image.mode in ('1', 'L'):
+        _to_bilevel(image).save(buffer, format='PNG', optimize=True)
+        return buffer.getvalue()
+    image = image.convert('RGB') if image.mode not in ('RGB', 'L') else image
+    if image_format == 'jpeg2000':
+        try:
+            image.save(buffer, format='JPEG2000', quality_mode='rates', quality_layers=[max(2.0, 500.0 / quality)])
+            return buffer.getvalue()
+        except (OSError, KeyError):
+            buffer = io.BytesIO()  # Pillow sem OpenJPEG: recorre a JPEG
+    image.save(buffer, format='JPEG', quality=quality, optimize=True)
+    return buffer.getvalue()
+
+def _recompress_image_xrefs(task):
+    """Helper to downsample and re-encode images by xref. Returns (xref, width, height, image_bytes|None) tuples."""
+    import fitz
+    from PIL import Image
+    source, items, image_format, quality = task
+    doc = _worker_document(source)
+    results = []
+    for xref, scale in items:
+        try:
+            pix = fitz.Pixmap(doc, xref)
+            if pix.alpha:
+                pix = fitz.Pixmap(pix, 0)
+            if pix.n - pix.alpha > 3:
+                pix = fitz.Pixmap(fitz.csRGB, pix)
+            mode = 'L' if pix.n == 1 else 'RGB'
+            image = Image.frombytes(mode, (pix.width, pix.height), pix.samples)
+            if scale < 1:
+                size = (max(1, round(pix.width * scale)), max(1, round(pix.height * scale)))
+                image = image.resize(size, Image.LANCZOS)
+            results.append((xref, image.width, image.height, _encode_compressed_image(image, image_format, quality)))
+        except Exception as e:
+            print(f"❌ Erro ao recomprimir imagem (xref {xref}): {str(e)}")
+            results.append((xref, 0, 0, None))
+    return results
+
+# ==================== ESCRITORES COMPARTILHADOS ====================
+# Usados tanto pelas funções de conversão individuais quanto pelo pipeline convert_all.
+_HTML_HEADER = """
+            <!DOCTYPE html>
+            <html>
+            <head>
+                <meta charset=\"UTF-8\">
+                <title>PDF Convertido</title>
+                <style>
+                    body { font-family: Arial, sans-serif; line-height: 1.6; margin: 40px; }
+                    .page { margin-bottom: 50px; padding: 20px; border-bottom: 1px solid #ccc; }
+                    .page-number { color: #666; font-size: 0.9em; }
+                    .page-image { max-width: 100%; display: block; margin-bottom: 20px; }
+                    .layout { position: relative; line-height: 1; }
+                    .layout span { position: absolute; white-space: pre; }
+                </style>
+            </head>
+            <body>
+            """
+
+_HTML_FOOTER = "</body></html>"
+
+def _html_image_tag(image_src):
+    if not image_src:
+        return ''
+    return f'<img class=\"page-image\" loading=\"lazy\" src=\"{html.escape(image_src)}\" alt=\"\">'
+
+def _html_page(page_num, text, image_src=None):
+    return f"""
+                <div class=\"page\">
+                    <div class=\"page-number\">Página {page_num}</div>
+                    {_html_image_tag(image_src)}
+                    <pre>{html.escape(text or '')}</pre>
+                </div>
+                """
+
+def _html_layout_page(page_num, width, height, spans, image_src=None):
+    """Render a page as absolutely positioned spans; spans are (x, y, font_size, text) in points."""
+    body = ''.join(
+        f'<span style=\"left:{x:.1f}pt;top:{y:.1f}pt;font-size:{size:.1f}pt\">{html.escape(text)}</span>'
+        for x, y, size, text in spans
+    )
+    return f"""
+                <div class=\"page\">
+                    <div class=\"page-number\">Página {page_num}</div>
+                    {_html_image_tag(image_src)}
+                    <div class=\"layout\" style=\"width:{width:.1f}pt;height:{height:.1f}pt\">{body}</div>
+                </div>
+                """
+
+def _write_tables_excel(tables, output_path):
+    """Write (page_num, table_index, rows) tables to one sheet each. Returns output_path or None."""
+    import pandas as pd
+    frames = []
+    for page_num, _, rows in tables:
+        df = pd.DataFrame(rows[1:], columns=rows[0])
+        df['PDF_Page'] = page_num
+        frames.append(df)
+    if not frames:
+        return None
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
+        for i, df in enumerate(frames):
+            df.to_excel(writer, sheet_name=f'Tabela_{i+1}', index=False)
+    return output_path
+
+def _write_tables_csv(tables, pdf_path, output_dir):
+    """Write each (page_num, table_index, rows) table to its own CSV. Returns the CSV paths."""
+    import pandas as pd
+    os.makedirs(output_dir, exist_ok=True)
+    csv_paths = []
+    for page_num, table_index, rows in tables:
+        csv_path = os.path.join(output_dir, os.path.basename(pdf_path).replace('.pdf', f'_page{page_num}_table{table_index}.csv'))
+        pd.DataFrame(rows).to_csv(csv_path, index=False, encoding='utf-8')
+        csv_paths.append(csv_path)
+        print(f"✅ Tabela salva como CSV: {csv_path}")
+    return csv_paths
+
+def _write_tables_parquet(tables, output_path):
+    """Write every table to one Parquet file in long format (pdf_page, table, row, column, value)."""
+    import pandas as pd
+    records = [
+        (page_num, table_index, row_index, column_index, value)
+        for page_num, table_index, rows in tables
+        for row_index, row in enumerate(rows)
+        for column_index, value in enumerate(row)
+    ]
+    if not records:
+        return None
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    df = pd.DataFrame(records, columns=['pdf_page', 'table', 'row', 'column', 'value'])
+    df.to_parquet(output_path, index=False)
+    return output_path
+
+def _open_ocr_output(pdf_path, output_files_dir, output_mode):
+    """Open the .txt and PDF outputs of OCR; pages are then written one at a time with _write_ocr_page."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+    import fitz
+    base_name = os.path.basename(pdf_path).replace('.pdf', '')
+    state = {
+        'mode': output_mode,
+        'txt_path': os.path.join(output_files_dir, f"{base_name}_ocr.txt"),
+        'pdf_path': os.path.join(output_files_dir, f"{base_name}_ocr.pdf"),
+        'report': {'pages': [], 'ocr_pages': 0, 'text_pages': 0, 'empty_pages': 0, 'seconds': 0.0},
+    }
+    if output_mode == 'searchable':
+        state['doc'] = fitz.open(pdf_path)
+    else:
+        state['canvas'] = canvas.Canvas(state['pdf_path'], pagesize=letter)
+        state['y'] = 750
+    state['txt_file'] = open(state['txt_path'], 'w', encoding='utf-8')
+    return state
+
+def _write_ocr_page(state, result):
+    """Append one page's OCR result (as returned by the OCR workers) to the open outputs."""
+    page_text = _format_ocr_page(result)
+    state['txt_file'].write(page_text)
+
+    words = result.get('words') or []
+    state['report']['pages'].append({key: value for key, value in result.items() if key not in ('words', 'text')})
+    state['report'][{'ocr': 'ocr_pages', 'texto': 'text_pages', 'vazia': 'empty_pages'}[result['method']]] += 1
+
+    if state['mode'] == 'searchable':
+        # Páginas classificadas como 'texto' já são pesquisáveis e ficam intactas
+        if words:
+            _insert_invisible_words(state['doc'][result['page'] - 1], words)
+    else:
+        c = state['canvas']
+        for line in page_text.split('\n'):
+            if state['y'] < 50:
+                c.showPage()
+                state['y'] = 750
+            c.drawString(50, state['y'], line[:80])
+            state['y'] -= 15
+
+def _close_ocr_output(state, save=True):
+    """Close the OCR outputs, saving the PDF when save is set. Returns the PDF path."""
+    state['txt_file'].close()
+    if state['mode'] == 'searchable':
+        if save:
+            state['doc'].save(state['pdf_path'], garbage=3, deflate=True)
+        state['doc'].close()
+    elif save:
+        state['canvas'].save()
+    return state['pdf_path']
+
+# ==================== ARQUIVOS ZIP ====================
+# Os artefatos são gravados diretamente no ZIP a partir da memória (sem arquivos intermediários),
+# com o método de compressão escolhido pela extensão: formatos já comprimidos (JPEG, PDF, DOCX...)
+# são apenas armazenados, e texto é comprimido. 'zstd' só está disponível no zipfile do Python 3.14+;
+# em versões anteriores cai para 'deflate'.
+ARCHIVE_COMPRESSION = {
+    '.jpg': 'store', '.jpeg': 'store', '.png': 'store', '.webp': 'store', '.jp2': 'store',
+    '.jpx': 'store', '.gif': 'store', '.tif': 'store', '.tiff': 'store',
+    '.pdf': 'store', '.zip': 'store', '.docx': 'store', '.xlsx': 'store', '.parquet': 'store',
+}
+ARCHIVE_DEFAULT_COMPRESSION = 'deflate'
+
+_ZIP_METHODS = {
+    'store': zipfile.ZIP_STORED,
+    'deflate': zipfile.ZIP_DEFLATED,
+    'bzip2': zipfile.ZIP_BZIP2,
+    'lzma': zipfile.ZIP_LZMA,
+    'zstd': getattr(zipfile, 'ZIP_ZSTANDARD', zipfile.ZIP_DEFLATED),
+}
+
+def set_archive_compression(extension, method):
+    """Define o método de compressão ('store', 'deflate', 'bzip2', 'lzma' ou 'zstd') para uma extensão."""
+    if method not in _ZIP_METHODS:
+        raise ValueError(f"Método de compressão desconhecido: {method}")
+    ARCHIVE_COMPRESSION[extension.lower()] = method
+
+def _archive_method(arcname):
+    extension = os.path.splitext(arcname)[1].lower()
+    return _ZIP_METHODS[ARCHIVE_COMPRESSION.get(extension, ARCHIVE_DEFAULT_COMPRESSION)]
+
+def _archive_info(arcname):
+    info = zipfile.ZipInfo(arcname, date_time=time.localtime()[:6])
+    info.compress_type = _archive_method(arcname)
+    return info
+
+def archive_add_bytes(zipf, arcname, data):
+    """Grava bytes diretamente no ZIP aberto, com a compressão adequada ao tipo do arquivo."""
+    zipf.writestr(_archive_info(arcname), data)
+
+def archive_add_file(zipf, path, arcname=None):
+    """Copia um arquivo do disco para o ZIP aberto, com a compressão adequada ao tipo do arquivo."""
+    arcname = arcname or os.path.basename(path)
+    zipf.write(path, arcname, compress_type=_archive_method(arcname))
+
+def write_archive(file_paths, zip_path):
+    """Cria um ZIP com os arquivos informados (ignorando os inexistentes). Retorna zip_path."""
+    os.makedirs(os.path.dirname(os.path.abspath(zip_path)), exist_ok=True)
+    read = 0
+    with zipfile.ZipFile(zip_path, 'w') as zipf:
+        for path in file_paths:
+            if os.path.exists(path):
+                archive_add_file(zipf, path)
+                read += os.path.getsize(path)
+            else:
+                print(f"⚠️ Arquivo não encontrado para adicionar ao ZIP: {path}")
+    record_io('zip', read=read, written=os.path.getsize(zip_path))
+    return zip_path
+
+class _ArchiveStream(io.RawIOBase):
+    """Write-only, non-seekable sink for zipfile whose content is drained in chunks."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def iter_archive(file_paths, chunk_size=1024 * 1024):
+    """Gera o conteúdo de um ZIP com os arquivos informados, em blocos, sem gravá-lo em disco
+
+    Próprio para respostas HTTP em streaming: o primeiro bloco sai antes de o ZIP estar completo.
+    """
+    stream = _ArchiveStream()
+    with zipfile.ZipFile(stream, 'w') as zipf:
+        for path in file_paths:
+            if not os.path.exists(path):
+                continue
+            info = _archive_info(os.path.basename(path))
+            info.file_size = os.path.getsize(path)  # Decide o ZIP64 antes de escrever (arquivos > 2 GiB)
+            with open(path, 'rb') as source, zipf.open(info, 'w') as dest:
+                for block in iter(lambda: source.read(chunk_size), b''):
+                    dest.write(block)
+                    data = stream.drain()
+                    if data:
+                        yield data
+            data = stream.drain()
+            if data:
+                yield data
+    yield stream.drain()
+
+# ==================== CACHE DE RESULTADOS ====================
+# Cada conversão é identificada pelo SHA-256 do(s) PDF(s) de entrada, pelo nome do(s) arquivo(s),
+# pelo nome da conversão e pelos seus parâmetros. Uma cópia dos artefatos gerados fica guardada em
+# <base>/cache/<chave>/ e é devolvida imediatamente quando a mesma conversão é pedida de novo.
+# Quando o cache ultrapassa CACHE_MAX_BYTES, as entradas usadas há mais tempo são removidas.
+# Resultados parciais (páginas que falharam) são devolvidos mas não guardados, para que a próxima
+# execução tente de novo as páginas que faltam a partir dos checkpoints.
+CACHE_ENABLED = True
+CACHE_MAX_BYTES = 2 * 1024 ** 3
+CACHE_DIR = None  # None = <GLOBAL_BASE_DRIVE_PATH>/cache
+_CACHE_VERSION = 3  # Incrementar quando mudar o que uma conversão produz para os mesmos parâmetros
+_CACHE_LOCK = threading.Lock()
+_CACHE_CONTEXT = threading.local()
+
+# Hashes já calculados neste processo: (caminho, mtime_ns, tamanho) -> sha256
+_FILE_HASHES = {}
+
+def set_cache_options(enabled=None, max_bytes=None, cache_dir=None):
+    global CACHE_ENABLED, CACHE_MAX_BYTES, CACHE_DIR
+    if enabled is not None:
+        CACHE_ENABLED = enabled
+    if max_bytes is not None:
+        CACHE_MAX_BYTES = max_bytes
+    if cache_dir is not None:
+        CACHE_DIR = cache_dir
+
+def get_cache_dir():
+    return CACHE_DIR or os.path.join(get_base_drive_path(), "cache")
+
+def clear_cache():
+    """Remove todas as entradas do cache de resultados."""
+    shutil.rmtree(get_cache_dir(), ignore_errors=True)
+
+def file_sha256(path):
+    """SHA-256 do conteúdo do arquivo, lido em blocos e memorizado por caminho/mtime/tamanho."""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    digest = _FILE_HASHES.get(key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                sha.update(block)
+        digest = _FILE_HASHES[key] = sha.hexdigest()
+        record_io('hash', read=stat.st_size)
+    return digest
+
+def register_file_sha256(path, digest):
+    """Memoriza o SHA-256 já calculado de um arquivo (por exemplo, durante o upload), evitando reler o arquivo."""
+    stat = os.stat(path)
+    _FILE_HASHES[(os.path.abspath(path), stat.st_mtime_ns, stat.st_size)] = digest
+
+def _is_artifact(value):
+    return isinstance(value, str) and (os.path.isabs(value) or os.sep in value) and os.path.isfile(value)
+
+def _encode_result(value, artifacts):
+    """Replace artifact paths in a conversion result with placeholders that survive JSON."""
+    if _is_artifact(value):
+        artifacts.append(value)
+        return {'__artifact__': len(artifacts) - 1}
+    if isinstance(value, (list, tuple)):
+        return {'__seq__': [_encode_result(item, artifacts) for item in value], 'tuple': isinstance(value, tuple)}
+    return value
+
+def _decode_result(value, paths):
+    if isinstance(value, dict) and '__data__' in value:
+        return value['__data__']
+    if isinstance(value, dict) and '__artifact__' in value:
+        return paths[value['__artifact__']]
+    if isinstance(value, dict) and '__seq__' in value:
+        items = [_decode_result(item, paths) for item in value['__seq__']]
+        return tuple(items) if value['tuple'] else items
+    return value
+
+def _cache_key(name, inputs, params):
+    payload = {
+        'version': _CACHE_VERSION,
+        'conversion': name,
+        'inputs': [(file_sha256(path), os.path.basename(path)) for path in inputs],
+        'params': params,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+def _cache_lookup(key):
+    """Return the decoded cached result for key, or None on a miss.
+
+    Cached artifacts are returned in place (inside the cache entry); they keep their original
+    file names, so zips and downloads built from them look exactly like a fresh conversion.
+    """
+    entry_dir = os.path.join(get_cache_dir(), key)
+    manifest_path = os.path.join(entry_dir, 'manifest.json')
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        paths = [os.path.join(entry_dir, str(index), name) for index, name in enumerate(manifest['artifacts'])]
+        if not all(os.path.isfile(path) for path in paths):
+            return None
+        os.utime(manifest_path)  # marca a entrada como usada recentemente (LRU)
+        return _decode_result(manifest['result'], paths)
+    except (OSError, ValueError, KeyError):
+        return None
+
+def _copy_result_to(value, output_dir):
+    """Copy the artifacts of a (cached) result into output_dir, returning the result with the new paths."""
+    if _is_artifact(value):
+        os.makedirs(output_dir, exist_ok=True)
+        destination = os.path.join(output_dir, os.path.basename(value))
+        shutil.copy2(value, destination)
+        size = os.path.getsize(destination)
+        record_io('cache', read=size, written=size)
+        return destination
+    if isinstance(value, (list, tuple)):
+        copied = [_copy_result_to(item, output_dir) for item in value]
+        return tuple(copied) if isinstance(value, tuple) else copied
+    return value
+
+def _cache_store(key, result, data_only=False):
+    """Store a conversion result and its artifacts under key, then enforce the size limit.
+
+    With data_only=True the result is plain data: strings are never taken for file paths.
+    """
+    artifacts = []
+    encoded = {'__data__': result} if data_only else _encode_result(result, artifacts)
+    cache_dir = get_cache_dir()
+    entry_dir = os.path.join(cache_dir, key)
+    tmp_dir = f"{entry_dir}.tmp-{os.getpid()}-{threading.get_ident()}"
+    try:
+        for index, path in enumerate(artifacts):
+            # Cópia, não hard link: as conversões regravam suas saídas no mesmo caminho
+            os.makedirs(os.path.join(tmp_dir, str(index)), exist_ok=True)
+            shutil.copy2(path, os.path.join(tmp_dir, str(index), os.path.basename(path)))
+            record_io('cache', read=os.path.getsize(path), written=os.path.getsize(path))
+        os.makedirs(tmp_dir, exist_ok=True)
+        with open(os.path.join(tmp_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump({'artifacts': [os.path.basename(path) for path in artifacts], 'result': encoded, 'created': time.time()}, f, default=str)
+        with _CACHE_LOCK:
+            if os.path.exists(entry_dir):
+                shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(tmp_dir, entry_dir)
+    except OSError as e:
+        print(f"⚠️ Não foi possível gravar no cache: {str(e)}")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    _evict_cache()
+
+def _directory_size(path):
+    total = 0
+    for root, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += os.path.getsize(os.path.join(root, filename))
+            except OSError:
+                pass
+    return total
+
+def _evict_cache():
+    """Remove least recently used entries until the cache fits in CACHE_MAX_BYTES."""
+    cache_dir = get_cache_dir()
+    with _CACHE_LOCK:
+        entries = []
+        for name in os.listdir(cache_dir) if os.path.isdir(cache_dir) else []:
+            manifest_path = os.path.join(cache_dir, name, 'manifest.json')
+            if os.path.isfile(manifest_path):
+                entries.append((os.path.getmtime(manifest_path), _directory_size(os.path.join(cache_dir, name)), name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= CACHE_MAX_BYTES:
+                break
+            shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+            total -= size
+
+def _render_key(params):
+    """Cache key parameters of a rasterizing conversion: the resolved profile plus the engine."""
+    params = dict(params, engine=RASTER_ENGINE)
+    if 'profile' in params:
+        # O nome do perfil não basta: RENDER_PROFILES pode ser alterado em tempo de execução
+        params['profile'] = get_render_profile(params['profile'])
+    return params
+
+def _ocr_key(params):
+    """Cache key parameters of pdf_ocr: the render settings plus the page classification thresholds."""
+    return dict(_render_key(params), thresholds=(OCR_MIN_TEXT_CHARS, OCR_MIN_IMAGE_COVERAGE, OCR_MAX_TEXT_COVERAGE))
+
+def _convert_all_key(params):
+    """Cache key parameters of convert_all: the engine, the profiles it renders with and the OCR thresholds."""
+    return dict(_ocr_key(params), profiles=(get_render_profile('default'), get_render_profile('ocr')))
+
+def _mark_incomplete():
+    """Called by a conversion whose result is partial: it is returned but not stored in the cache."""
+    _CACHE_CONTEXT.incomplete = True
+
+def _cached_conversion(func=None, *, key_params=None):
+    """Decorator: serve a conversion from the result cache, storing successful results.
+
+    The first positional argument is the input PDF path (or a list of paths, for merge_pdfs);
+    every other argument except output_dir is part of the cache key. key_params(params), when
+    given, returns the parameters actually keyed: it resolves names to the settings they stand
+    for and adds module settings that change the output. A hit copies the cached files to the
+    conversion's output folder (output_dir or <base>/output_files).
+    """
+    if func is None:
+        return functools.partial(_cached_conversion, key_params=key_params)
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        params = dict(bound.arguments)
+        first_param = next(iter(signature.parameters))
+        inputs = params.pop(first_param)
+        inputs = [inputs] if isinstance(inputs, str) else list(inputs)
+        output_dir = params.pop('output_dir', None)  # destino dos arquivos, não muda o resultado
+        if key_params is not None:
+            params = key_params(params)
+
+        def convert():
+            result = func(*args, **kwargs)
+            record_io('entrada', read=_file_sizes(inputs))
+            record_io('saida', written=_file_sizes(result))
+            return result
+
+        if not CACHE_ENABLED:
+            return convert()
+
+        try:
+            key = _cache_key(func.__name__, inputs, params)
+        except OSError:
+            # Entrada inexistente ou ilegível: a própria conversão relata o erro
+            return convert()
+
+        cached = _cache_lookup(key)
+        if cached is not None:
+            print(f"⚡ Resultado reaproveitado do cache ({func.__name__}): {', '.join(os.path.basename(p) for p in inputs)}")
+            # Os arquivos do cache podem ser removidos pelo LRU: quem chamou recebe sempre cópias
+            return _copy_result_to(cached, _output_dir(output_dir))
+
+        outer_incomplete = getattr(_CACHE_CONTEXT, 'incomplete', False)
+        _CACHE_CONTEXT.incomplete = False
+        try:
+            result = convert()
+            incomplete = _CACHE_CONTEXT.incomplete
+        finally:
+            _CACHE_CONTEXT.incomplete = outer_incomplete or _CACHE_CONTEXT.incomplete
+        if result and not incomplete and (not isinstance(result, tuple) or result[0]):
+            _cache_store(key, result)
+        return result
+
+    return wrapper
+
+# ==================== CHECKPOINTS POR PÁGINA ====================
+# Resultados de cada página (OCR e imagens renderizadas) são gravados em um SQLite assim que
+# chegam, indexados pelo hash do documento, tipo de resultado, parâmetros (DPI, idioma...) e
+# número da página. Se o processo cair no meio de um documento grande, a próxima execução só
+# processa as páginas que faltam. Ao concluir o documento sem falhas, os checkpoints dele são
+# descartados (com o cache ativo, o resultado completo já estará nele).
+PAGE_STORE_PATH = None  # None = <cache>/pages.sqlite
+
+def _page_store_path():
+    return PAGE_STORE_PATH or os.path.join(get_cache_dir(), "pages.sqlite")
+
+@contextmanager
+def _page_store():
+    path = _page_store_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                doc_hash TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                params TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                data BLOB NOT NULL,
+                created REAL NOT NULL,
+                PRIMARY KEY (doc_hash, kind, params, page)
+            )
+        """)
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+def _page_params(**params):
+    return json.dumps(params, sort_keys=True)
+
+def _checkpointed_pages(doc_hash, kind, params):
+    """Return the set of pages already stored for this document and parameters (data stays on disk)."""
+    try:
+        with _page_store() as conn:
+            rows = conn.execute("SELECT page FROM pages WHERE doc_hash = ? AND kind = ? AND params = ?",
+                                (doc_hash, kind, params)).fetchall()
+        return {page for page, in rows}
+    except sqlite3.Error as e:
+        print(f"⚠️ Checkpoints indisponíveis: {str(e)}")
+        return set()
+
+def _load_page_checkpoint(conn, doc_hash, kind, params, page):
+    row = conn.execute("SELECT data FROM pages WHERE doc_hash = ? AND kind = ? AND params = ? AND page = ?",
+                       (doc_hash, kind, params, page)).fetchone()
+    return bytes(row[0])
+
+def _save_page_checkpoint(conn, doc_hash, kind, params, page, data):
+    conn.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)",
+                 (doc_hash, kind, params, page, sqlite3.Binary(data), time.time()))
+    conn.commit()
+
+def _discard_page_checkpoints(doc_hash, kind, params):
+    try:
+        with _page_store() as conn:
+            conn.execute("DELETE FROM pages WHERE doc_hash = ? AND kind = ? AND params = ?", (doc_hash, kind, params))
+    except sqlite3.Error:
+        pass
+
+def clear_page_checkpoints():
+    """Remove todos os checkpoints por página."""
+    path = _page_store_path()
+    if os.path.exists(path):
+        os.remove(path)
+
+def _merge_checkpointed(total_pages, done, fresh_chunks, load):
+    """Yield (page_num, result, is_fresh) in page order.
+
+    done is the set of checkpointed pages, read one at a time with load(page_num) when their
+    turn comes; fresh_chunks yields, in order, lists of (page_num, result) for the remaining
+    pages. At most one chunk is buffered, so memory does not grow with the page count.
+    """
+    buffered = {}
+    fresh_chunks = iter(fresh_chunks)
+    for page_num in range(1, total_pages + 1):
+        if page_num in done:
+            yield page_num, load(page_num), False
+            continue
+        while page_num not in buffered:
+            buffered.update(next(fresh_chunks))
+        yield page_num, buffered.pop(page_num), True
+
+# ==================== CONJUNTO DE TABELAS ====================
+# A detecção de tabelas do pdfplumber é a operação mais cara que executamos. Ela roda uma única
+# vez por documento, em paralelo por página, e o conjunto de tabelas resultante fica em memória
+# para os escritores de Excel, CSV e Parquet.
+TABLE_SET_CACHE_SIZE = 4
+
+_TABLE_SETS = OrderedDict()
+_TABLE_SET_LOCKS = {}
+_TABLE_SETS_LOCK = threading.Lock()
+
+def extract_tables(pdf_path):
+    """Extrai as tabelas de todas as páginas do PDF, em paralelo, uma única vez por documento
+
+    Retorna uma lista de (página, índice da tabela na página, linhas). Chamadas seguintes para o
+    mesmo conteúdo (inclusive concorrentes) reaproveitam o conjunto já extraído, em memória ou
+    no cache de resultados (guardado como dados JSON: células nunca são tratadas como arquivos).
+    """
+    import fitz
+    key = file_sha256(pdf_path)
+    with _TABLE_SETS_LOCK:
+        lock = _TABLE_SET_LOCKS.setdefault(key, threading.Lock())
+    with lock:
+        with _TABLE_SETS_LOCK:
+            if key in _TABLE_SETS:
+                _TABLE_SETS.move_to_end(key)
+                return _TABLE_SETS[key]
+
+        cache_key = _cache_key('extract_tables', [pdf_path], {}) if CACHE_ENABLED else None
+        cached = _cache_lookup(cache_key) if cache_key else None
+        if cached is not None:
+            print(f"⚡ Tabelas reaproveitadas do cache: {os.path.basename(pdf_path)}")
+            tables = [tuple(table) for table in cached]
+        else:
+            with fitz.open(pdf_path) as doc:
+                total_pages = doc.page_count
+
+            tables = []
+            with _shared_document(pdf_path) as source, \
+                    _progress_bar(total=total_pages, desc=f"Extraindo tabelas de {os.path.basename(pdf_path)}") as pbar:
+                chunks = _page_chunks(total_pages)
+                tasks = [ (source, first, last) for first, last in chunks ]
+                for (first, last), chunk_tables in zip(chunks, _pool_map(_extract_tables_page_range, tasks)):
+                    tables.extend(chunk_tables)
+                    pbar.update(last - first + 1)
+            if cache_key:
+                _cache_store(cache_key, tables, data_only=True)
+
+        with _TABLE_SETS_LOCK:
+            _TABLE_SETS[key] = tables
+            while len(_TABLE_SETS) > TABLE_SET_CACHE_SIZE:
+                evicted, _ = _TABLE_SETS.popitem(last=False)
+                _TABLE_SET_LOCKS.pop(evicted, None)
+        return tables
 
 # ==================== FUNÇÕES DE CONVERSÃO ====================
-def pdf_to_text(pdf_path):
-    """Converte PDF para arquivo de texto usando pdfplumber"""
-    output_path = os.path.join(get_base_drive_path(), "output_files", os.path.basename(pdf_path).replace('.pdf', '.txt'))
+@_cached_conversion
+def pdf_to_text(pdf_path, backend='pdfplumber', output_dir=None):
+    """Converte PDF para arquivo de texto
+
+    As páginas são extraídas em paralelo (uma única extração por página) e gravadas no arquivo em
+    ordem, à medida que ficam prontas. backend='pdfplumber' (padrão) preserva melhor o layout;
+    backend='fitz' usa o PyMuPDF e é bem mais rápido.
+    """
+    import fitz
+    if backend not in ('pdfplumber', 'fitz'):
+        raise ValueError(f"Backend de texto desconhecido: {backend}")
+
+    output_path = os.path.join(_output_dir(output_dir), os.path.basename(pdf_path).replace('.pdf', '.txt'))
 
     try:
-        text = ""
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                text += page.extract_text(x_tolerance=1) if page.extract_text() else '' # x_tolerance para melhor fusão de texto
+        with fitz.open(pdf_path) as doc:
+            total_pages = doc.page_count
 
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        with open(output_path, 'w', encoding='utf-8') as text_file:
-            text_file.write(text)
-
-        print(f"✅ PDF convertido para texto com pdfplumber: {output_path}")
+        with open(output_path, 'w', encoding='utf-8') as text_file, \
+                _shared_document(pdf_path) as source, \
+                _progress_bar(total=total_pages, desc=f"Extraindo texto de {os.path.basename(pdf_path)}") as pbar:
+            tasks = [ (source, first, last, backend) for first, last in _page_chunks(total_pages) ]
+            for pages in _pool_map(_extract_text_page_range, tasks):
+                for _, text in pages:
+                    text_file.write(text)
+                pbar.update(len(pages))
+
+        print(f"✅ PDF convertido para texto com {backend}: {output_path}")
         return output_path
 
-    except PyPDF2.errors.PdfReadError:
+    except fitz.FileDataError:
         print(f"❌ Erro: O PDF '{os.path.basename(pdf_path)}' parece estar corrompido ou protegido por senha e não pode ser lido.")
         return None
     except FileNotFoundError:
@@ -92,15 +1594,101 @@ def pdf_to_text(pdf_path):
         print(f"❌ Erro inesperado na conversão para texto: {str(e)}")
         return None
 
-def pdf_to_word(pdf_path):
-    """Converte PDF para Word (.docx)"""
-    output_path = os.path.join(get_base_drive_path(), "output_files", os.path.basename(pdf_path).replace('.pdf', '.docx'))
-
+WORD_PARALLEL_MIN_PAGES = 16  # Abaixo disso, iniciar processos custa mais do que converte
+WORD_PARALLEL_JOBS = 1        # Documentos Word analisados em paralelo ao mesmo tempo; os demais esperam
+
+_WORD_PARALLEL_SLOTS = threading.BoundedSemaphore(WORD_PARALLEL_JOBS)
+
+class _Pdf2docxProgress(logging.Handler):
+    """Logging handler that turns pdf2docx's '[k/4] phase' and '(i/n) Page' messages into tqdm updates.
+
+    pdf2docx reports through the root logger; only records from the converting thread are used, so
+    concurrent conversions do not mix their progress.
+    """
+    def __init__(self, pbar):
+        super().__init__(logging.INFO)
+        self.pbar = pbar
+        self.thread = threading.get_ident()
+
+    def emit(self, record):
+        if record.thread != self.thread:
+            return
+        message = record.getMessage()
+        phase = re.search(r'\[\d/\d\]\s*(.+?)\.*$', message)
+        if phase:
+            self.pbar.set_description(f"Word: {phase.group(1)}")
+            return
+        step = re.search(r'\((\d+)/(\d+)\)', message)
+        if step:
+            done, total = int(step.group(1)), int(step.group(2))
+            if self.pbar.total != total:
+                self.pbar.reset(total=total)
+            self.pbar.update(done - self.pbar.n)
+
+def _parse_docx_page_range(task):
+    """Worker: parse a page range with pdf2docx and return its stored pages.
+
+    This is what pdf2docx's own multi_processing does, minus the pages-N.json files it writes to
+    the current directory (shared by concurrent conversions) and the Pool() it starts per call.
+    """
+    from pdf2docx import Converter
+    pdf_path, first_page, last_page = task
+    cv = Converter(pdf_path)
     try:
-        cv = Converter(pdf_path)
-        cv.convert(output_path, start=0, end=None)
+        cv.parse(first_page - 1, last_page, **cv.default_settings)
+        return cv.store()
+    finally:
         cv.close()
 
+def _convert_to_docx(pdf_path, output_path, cpu_count=1):
+    """Run pdf2docx, parsing page ranges on the shared pool when cpu_count > 1, with a tqdm bar."""
+    from pdf2docx import Converter
+    root = logging.getLogger()
+    previous_level = root.level
+    with _progress_bar(desc=f"Word: {os.path.basename(pdf_path)}") as pbar:
+        handler = _Pdf2docxProgress(pbar)
+        root.addHandler(handler)
+        root.setLevel(min(previous_level, logging.INFO) if previous_level else logging.INFO)
+        cv = Converter(pdf_path)
+        try:
+            if cpu_count > 1:
+                total_pages = len(cv.fitz_doc)
+                chunks = _chunk_pages(range(1, total_pages + 1), -(-total_pages // cpu_count))
+                pbar.set_description("Word: Parsing pages")
+                pbar.reset(total=total_pages)
+                with _WORD_PARALLEL_SLOTS:
+                    tasks = [ (pdf_path, first, last) for first, last in chunks ]
+                    for (first, last), stored in zip(chunks, _pool_map(_parse_docx_page_range, tasks)):
+                        cv.restore(stored)
+                        pbar.update(last - first + 1)
+                cv.make_docx(output_path, **cv.default_settings)
+            else:
+                cv.convert(output_path, start=0, end=None)
+        finally:
+            cv.close()
+            root.removeHandler(handler)
+            root.setLevel(previous_level)
+
+@_cached_conversion
+def pdf_to_word(pdf_path, workers=None, output_dir=None):
+    """Converte PDF para Word (.docx)
+
+    Documentos com pelo menos WORD_PARALLEL_MIN_PAGES páginas têm as páginas divididas em workers
+    intervalos (padrão: tamanho do pool de workers ou todos os núcleos), analisados no pool de
+    workers compartilhado; o .docx é montado neste processo. No máximo WORD_PARALLEL_JOBS
+    documentos são analisados assim ao mesmo tempo. Documentos menores usam um único processo.
+    """
+    import fitz
+    output_path = os.path.join(_output_dir(output_dir), os.path.basename(pdf_path).replace('.pdf', '.docx'))
+
+    try:
+        with fitz.open(pdf_path) as doc:
+            total_pages = doc.page_count
+        cpu_count = workers or WORKER_POOL_SIZE or os.cpu_count() or 1
+        if total_pages < WORD_PARALLEL_MIN_PAGES or _IN_WORKER:
+            cpu_count = 1
+        _convert_to_docx(pdf_path, output_path, min(cpu_count, total_pages) or 1)
+
         print(f"✅ PDF convertido para Word: {output_path}")
         return output_path
 
@@ -108,29 +1696,15 @@ def pdf_to_word(pdf_path):
         print(f"❌ Erro na conversão para Word: {str(e)}")
         return None
 
-def pdf_to_excel(pdf_path):
+@_cached_conversion
+def pdf_to_excel(pdf_path, output_dir=None):
     """Extrai tabelas do PDF para Excel"""
-    output_path = os.path.join(get_base_drive_path(), "output_files", os.path.basename(pdf_path).replace('.pdf', '.xlsx'))
+    output_path = os.path.join(_output_dir(output_dir), os.path.basename(pdf_path).replace('.pdf', '.xlsx'))
 
     try:
-        all_tables = []
-
-        with pdfplumber.open(pdf_path) as pdf:
-            for page_num, page in enumerate(pdf.pages):
-                tables = page.extract_tables()
-
-                for table_num, table in enumerate(tables):
-                    if table:
-                        df = pd.DataFrame(table[1:], columns=table[0])
-                        df['PDF_Page'] = page_num + 1
-                        all_tables.append(df)
-
-        if all_tables:
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-            with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-                for i, df in enumerate(all_tables):
-                    df.to_excel(writer, sheet_name=f'Tabela_{i+1}', index=False)
+        all_tables = extract_tables(pdf_path)
 
+        if _write_tables_excel(all_tables, output_path):
             print(f"✅ Tabelas extraídas para Excel: {output_path}")
             return output_path
         else:
@@ -141,94 +1715,140 @@ def pdf_to_excel(pdf_path):
         print(f"❌ Erro na extração para Excel: {str(e)}")
         return None
 
-def pdf_to_images(pdf_path):
-    """Converte cada página do PDF para imagem usando processamento paralelo e barra de progresso"""
+@_cached_conversion(key_params=_render_key)
+def pdf_to_images(pdf_path, keep_files=False, profile='default', output_dir=None):
+    """Converte cada página do PDF para imagem usando processamento paralelo e barra de progresso
+
+    profile escolhe DPI, espaço de cor, formato e tamanhos (veja RENDER_PROFILES; padrão: JPEG a
+    200 DPI). Todos os tamanhos de uma página saem da mesma renderização: a imagem principal fica
+    na raiz do ZIP e cada miniatura em uma pasta <tamanho>px. As imagens vão direto para o ZIP;
+    com keep_files=True também são gravadas individualmente em disco.
+    """
+    import fitz
+    profile = get_render_profile(profile)
     base_name = os.path.basename(pdf_path).replace('.pdf', '')
-    output_dir = os.path.join(get_base_drive_path(), "output_files", f"{base_name}_images")
-    os.makedirs(output_dir, exist_ok=True)
+    pages_dir = os.path.join(_output_dir(output_dir), f"{base_name}_images")
+    zip_path = os.path.join(_output_dir(output_dir), f"{base_name}_images.zip")
+    os.makedirs(pages_dir if keep_files else os.path.dirname(zip_path), exist_ok=True)
 
     try:
-        with open(pdf_path, 'rb') as f:
-            pdf_bytes_data = f.read()
-
-        reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes_data))
-        total_pages = len(reader.pages)
-
-        image_paths = []
-        tasks = [ (pdf_bytes_data, i + 1, 200, output_dir) for i in range(total_pages) ]
-
-        with ProcessPoolExecutor() as executor:
-            results = list(tqdm(executor.map(_convert_single_page_to_image, tasks), total=total_pages, desc=f"Convertendo {base_name} para imagens"))
-            for path in results:
-                if path:
-                    image_paths.append(path)
-
-        if not image_paths:
+        with fitz.open(pdf_path) as doc:
+            total_pages = doc.page_count
+
+        doc_hash = file_sha256(pdf_path)
+        params = _page_params(engine=RASTER_ENGINE, **profile)
+        done = _checkpointed_pages(doc_hash, 'image', params)
+        if done:
+            print(f"↻ Retomando: {len(done)} de {total_pages} páginas já renderizadas")
+
+        converted_pages = 0
+        failed_pages = 0
+        with zipfile.ZipFile(zip_path, 'w') as zipf, \
+                _shared_document(pdf_path) as source, _page_store() as store, \
+                _progress_bar(total=total_pages, desc=f"Convertendo {base_name} para imagens", initial=len(done)) as pbar:
+            pending = [page_num for page_num in range(1, total_pages + 1) if page_num not in done]
+            tasks = [ (source, first, last, profile, RASTER_ENGINE) for first, last in _chunk_pages(pending) ]
+            fresh = _pool_map(_convert_page_range_to_images, tasks)
+            load = lambda page_num: _unpack_renders(_load_page_checkpoint(store, doc_hash, 'image', params, page_num))
+            for page_num, renders, is_fresh in _merge_checkpointed(total_pages, done, fresh, load):
+                if renders is None:
+                    failed_pages += 1
+                else:
+                    for label, image_bytes in renders.items():
+                        image_name = _render_name(page_num, label, profile)
+                        archive_add_bytes(zipf, image_name, image_bytes)
+                        if keep_files:
+                            image_path = os.path.join(pages_dir, image_name)
+                            os.makedirs(os.path.dirname(image_path), exist_ok=True)
+                            with open(image_path, 'wb') as image_file:
+                                image_file.write(image_bytes)
+                    converted_pages += 1
+                if is_fresh:
+                    if renders is not None:
+                        _save_page_checkpoint(store, doc_hash, 'image', params, page_num, _pack_renders(renders))
+                    pbar.update(1)
+
+        if not converted_pages:
+            os.remove(zip_path)
             print("ℹ️ Nenhuma imagem foi convertida.")
             return None
 
-        zip_path = os.path.join(get_base_drive_path(), "output_files", f"{base_name}_images.zip")
-        with zipfile.ZipFile(zip_path, 'w') as zipf:
-            for img_path in image_paths:
-                zipf.write(img_path, os.path.basename(img_path))
+        if failed_pages:
+            _mark_incomplete()
+            print(f"⚠️ {failed_pages} página(s) falharam; o resultado não foi guardado no cache e elas serão refeitas na próxima execução")
+        else:
+            _discard_page_checkpoints(doc_hash, 'image', params)
 
-        print(f"✅ PDF convertido para {len(image_paths)} imagens (paralelo): {zip_path}")
+        print(f"✅ PDF convertido para {converted_pages} imagens (paralelo): {zip_path}")
         return zip_path
 
     except Exception as e:
         print(f"❌ Erro na conversão para imagens (paralelo): {str(e)}")
         return None
 
-def pdf_to_html(pdf_path):
-    """Converte PDF para HTML simples"""
-    output_path = os.path.join(get_base_drive_path(), "output_files", os.path.basename(pdf_path).replace('.pdf', '.html'))
+@_cached_conversion(key_params=_render_key)
+def pdf_to_html(pdf_path, layout=False, page_images=False, output_dir=None):
+    """Converte PDF para HTML
 
-    try:
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-
-            html_content = """
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset=\"UTF-8\">
-                <title>PDF Convertido</title>
-                <style>
-                    body { font-family: Arial, sans-serif; line-height: 1.6; margin: 40px; }
-                    .page { margin-bottom: 50px; padding: 20px; border-bottom: 1px solid #ccc; }
-                    .page-number { color: #666; font-size: 0.9em; }
-                </style>
-            </head>
-            <body>
-            """
-
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                text = page.extract_text()
-
-                html_content += f"""
-                <div class=\"page\">
-                    <div class=\"page-number\">Página {page_num + 1}</div>
-                    <pre>{text}</pre>
-                </div>
-                """
-
-            html_content += "</body></html>"
+    As páginas são extraídas em paralelo e gravadas no arquivo em ordem, à medida que ficam prontas,
+    sem montar o documento inteiro em memória. layout=True posiciona cada trecho de texto onde ele
+    aparece na página (blocos posicionados do PyMuPDF). page_images=True inclui uma imagem de cada
+    página, carregada sob demanda pelo navegador; nesse caso o HTML e as imagens são entregues em um ZIP.
+    """
+    import fitz
+    base_name = os.path.basename(pdf_path).replace('.pdf', '')
+    output_files_dir = _output_dir(output_dir)
+    output_path = os.path.join(output_files_dir, f"{base_name}.html")
+    assets_name = f"{base_name}_html_files"
+    zip_path = os.path.join(output_files_dir, f"{base_name}_html.zip")
 
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-            with open(output_path, 'w', encoding='utf-8') as html_file:
-                html_file.write(html_content)
+    zipf = None
+    try:
+        with fitz.open(pdf_path) as doc:
+            total_pages = doc.page_count
+
+        os.makedirs(output_files_dir, exist_ok=True)
+        # As imagens das páginas vão direto para o ZIP, sem passar pelo disco
+        zipf = zipfile.ZipFile(zip_path, 'w') if page_images else None
+
+        with open(output_path, 'w', encoding='utf-8') as html_file, \
+                _shared_document(pdf_path) as source, \
+                _progress_bar(total=total_pages, desc=f"Convertendo {base_name} para HTML") as pbar:
+            html_file.write(_HTML_HEADER)
+            tasks = [ (source, first, last, layout, 96 if page_images else None, RASTER_ENGINE) for first, last in _page_chunks(total_pages) ]
+            for pages in _pool_map(_html_page_range, tasks):
+                for page_num, content, image_bytes in pages:
+                    image_src = None
+                    if image_bytes is not None:
+                        image_src = f"{assets_name}/pagina_{page_num}.jpg"
+                        archive_add_bytes(zipf, image_src, image_bytes)
+                    if layout:
+                        html_file.write(_html_layout_page(page_num, *content, image_src=image_src))
+                    else:
+                        html_file.write(_html_page(page_num, content, image_src=image_src))
+                pbar.update(len(pages))
+            html_file.write(_HTML_FOOTER)
+
+        if zipf is not None:
+            archive_add_file(zipf, output_path)
+            zipf.close()
+            print(f"✅ PDF convertido para HTML com imagens das páginas: {zip_path}")
+            return zip_path
 
-            print(f"✅ PDF convertido para HTML: {output_path}")
-            return output_path
+        print(f"✅ PDF convertido para HTML: {output_path}")
+        return output_path
 
     except Exception as e:
+        if zipf is not None:
+            zipf.close()
         print(f"❌ Erro na conversão para HTML: {str(e)}")
         return None
 
-def pdf_to_pdfa(pdf_path):
+@_cached_conversion
+def pdf_to_pdfa(pdf_path, output_dir=None):
     """Converte para PDF/A (padrão arquivável) usando PyMuPDF (fitz)"""
-    output_path = os.path.join(get_base_drive_path(), "output_files", os.path.basename(pdf_path).replace('.pdf', '_pdfa.pdf'))
+    import fitz
+    output_path = os.path.join(_output_dir(output_dir), os.path.basename(pdf_path).replace('.pdf', '_pdfa.pdf'))
 
     try:
         doc = fitz.open(pdf_path)
@@ -243,95 +1863,160 @@ def pdf_to_pdfa(pdf_path):
         print(f"❌ Erro na conversão para PDF/A com fitz: {str(e)}")
         return None
 
-def pdf_ocr(pdf_path):
-    """Aplica OCR no PDF para extrair texto de imagens usando processamento paralelo e barra de progresso"""
+@_cached_conversion(key_params=_ocr_key)
+def pdf_ocr(pdf_path, output_mode='searchable', skip_text_pages=True, return_report=False, profile='ocr', output_dir=None):
+    """Aplica OCR no PDF para extrair texto de imagens usando processamento paralelo e barra de progresso
+
+    output_mode='searchable' (padrão) mantém as páginas originais e sobrepõe uma camada de texto
+    invisível com as palavras reconhecidas, gerando um PDF pesquisável de verdade.
+    output_mode='text' gera um PDF novo apenas com o texto reconhecido (comportamento antigo).
+    Em ambos os modos cada página é gravada assim que seu resultado de OCR chega.
+
+    Com skip_text_pages=True, páginas que já possuem camada de texto não passam pelo OCR: o texto
+    é lido diretamente e só as páginas com imagem são rasterizadas. Com return_report=True a função
+    retorna (caminho, relatório), onde o relatório traz a decisão e o tempo de cada página.
+    profile define o DPI e o espaço de cor da rasterização (padrão 'ocr': 300 DPI em tons de
+    cinza, mais barato de renderizar e de reconhecer que RGB; 'mono' binariza as páginas).
+    """
+    import fitz
+    if output_mode not in ('searchable', 'text'):
+        raise ValueError(f"Modo de saída do OCR desconhecido: {output_mode}")
+    profile = get_render_profile(profile)
+
+    started = time.perf_counter()
     base_name = os.path.basename(pdf_path).replace('.pdf', '')
-    output_files_dir = os.path.join(get_base_drive_path(), "output_files")
+    output_files_dir = _output_dir(output_dir)
     os.makedirs(output_files_dir, exist_ok=True)
 
+    state = None
     try:
-        with open(pdf_path, 'rb') as f:
-            pdf_bytes_data = f.read()
-
-        reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes_data))
-        total_pages = len(reader.pages)
-
-        tasks = [ (pdf_bytes_data, i + 1, 300, 'por+eng') for i in range(total_pages) ]
-
-        text_content_parts = []
-        with ProcessPoolExecutor() as executor:
-            results = list(tqdm(executor.map(_ocr_single_page, tasks), total=total_pages, desc=f"Processando OCR para {base_name}"))
-            for part in results:
-                text_content_parts.append(part)
-
-        text_content = "".join(text_content_parts)
-
-        output_txt_path = os.path.join(output_files_dir, f"{base_name}_ocr.txt")
-        with open(output_txt_path, 'w', encoding='utf-8') as f:
-            f.write(text_content)
-        print(f"✅ Texto OCR extraído salvo em: {output_txt_path}")
-
-        pdf_output_path = os.path.join(output_files_dir, f"{base_name}_ocr.pdf")
-        c = canvas.Canvas(pdf_output_path, pagesize=letter)
-
-        lines = text_content.split('\n')
-        y = 750
-        for line in lines:
-            if y < 50:
-                c.showPage()
-                y = 750
-            display_line = line[:80]
-            c.drawString(50, y, display_line)
-            y -= 15
-
-        c.save()
+        with fitz.open(pdf_path) as doc:
+            total_pages = doc.page_count
+
+        doc_hash = file_sha256(pdf_path)
+        params = _page_params(dpi=profile['dpi'], colorspace=profile['colorspace'], lang='por+eng', engine=RASTER_ENGINE, skip_text_pages=skip_text_pages,
+                             coverage=(OCR_MIN_IMAGE_COVERAGE, OCR_MAX_TEXT_COVERAGE))
+        done = _checkpointed_pages(doc_hash, 'ocr', params)
+        if done:
+            print(f"↻ Retomando: {len(done)} de {total_pages} páginas já processadas")
+
+        state = _open_ocr_output(pdf_path, output_files_dir, output_mode)
+        report = state['report']
+        failed_pages = 0
+        with _shared_document(pdf_path) as source, _page_store() as store, \
+                _progress_bar(total=total_pages, desc=f"Processando OCR para {base_name}", initial=len(done)) as pbar:
+            pending = [page_num for page_num in range(1, total_pages + 1) if page_num not in done]
+            tasks = [ (source, first, last, profile['dpi'], 'por+eng', RASTER_ENGINE, skip_text_pages, profile['colorspace']) for first, last in _chunk_pages(pending) ]
+            fresh = ([(result['page'], result) for result in chunk] for chunk in _pool_map(_ocr_page_range, tasks))
+            load = lambda page_num: json.loads(_load_page_checkpoint(store, doc_hash, 'ocr', params, page_num))
+            for page_num, result, is_fresh in _merge_checkpointed(total_pages, done, fresh, load):
+                if is_fresh:
+                    if result['error']:
+                        failed_pages += 1
+                    else:
+                        _save_page_checkpoint(store, doc_hash, 'ocr', params, page_num, json.dumps(result).encode('utf-8'))
+                    pbar.update(1)
+                _write_ocr_page(state, result)
+
+        pdf_output_path = _close_ocr_output(state)
+        print(f"✅ Texto OCR extraído salvo em: {state['txt_path']}")
+
+        if failed_pages:
+            _mark_incomplete()
+            print(f"⚠️ {failed_pages} página(s) falharam; o resultado não foi guardado no cache e elas serão refeitas na próxima execução")
+        else:
+            _discard_page_checkpoints(doc_hash, 'ocr', params)
 
+        report['seconds'] = time.perf_counter() - started
         print(f"✅ PDF pesquisável com OCR criado: {pdf_output_path}")
-        return pdf_output_path
+        print(f"   Páginas com OCR: {report['ocr_pages']} | com camada de texto: {report['text_pages']} | vazias: {report['empty_pages']} ({report['seconds']:.1f} s)")
+        return (pdf_output_path, report) if return_report else pdf_output_path
 
     except Exception as e:
         print(f"❌ Erro no OCR com processamento paralelo: {str(e)}")
         print("⚠️ Certifique-se de que Tesseract está instalado corretamente")
-        return None
-
-def extract_images_from_pdf(pdf_path):
-    """Extrai todas as imagens de um PDF"""
+        if state is not None:
+            _close_ocr_output(state, save=False)
+        report = state['report'] if state else {'pages': [], 'ocr_pages': 0, 'text_pages': 0, 'empty_pages': 0}
+        report['seconds'] = time.perf_counter() - started
+        return (None, report) if return_report else None
+
+@_cached_conversion
+def extract_images_from_pdf(pdf_path, min_size=0, min_area=0, keep_files=False, output_dir=None):
+    """Extrai as imagens incorporadas de um PDF, gravando cada imagem única uma única vez
+
+    Imagens repetidas (logotipos, timbres) são decodificadas uma vez por xref e, se tiverem conteúdo
+    idêntico sob xrefs diferentes, gravadas uma vez por hash. O arquivo manifest.json no ZIP informa
+    em quais páginas cada imagem aparece. Imagens com largura ou altura menor que min_size pixels, ou
+    área menor que min_area pixels, são ignoradas (ícones e detalhes decorativos). As imagens vão
+    direto para o ZIP; com keep_files=True também são gravadas individualmente em disco.
+    """
+    import fitz
     base_name = os.path.basename(pdf_path).replace('.pdf', '')
-    output_dir = os.path.join(get_base_drive_path(), "output_files", f"{base_name}_extracted_images")
-    os.makedirs(output_dir, exist_ok=True)
+    images_dir = os.path.join(_output_dir(output_dir), f"{base_name}_extracted_images")
+    zip_path = os.path.join(_output_dir(output_dir), f"{base_name}_extracted_images.zip")
+    os.makedirs(images_dir if keep_files else os.path.dirname(zip_path), exist_ok=True)
 
     try:
-        pdf_document = fitz.open(pdf_path)
-        image_paths = []
-
-        for page_num in tqdm(range(len(pdf_document)), desc=f"Extraindo imagens de {os.path.basename(pdf_path)}"):
-            page = pdf_document[page_num]
-            image_list = page.get_images(full=True)
-
-            for img_index, img in enumerate(image_list):
-                xref = img[0]
-                base_image = pdf_document.extract_image(xref)
-                image_bytes = base_image["image"]
-
-                image_ext = base_image["ext"]
-                image_filename = os.path.join(output_dir, f"pagina_{page_num+1}_img_{img_index+1}.{image_ext}")
-
-                with open(image_filename, "wb") as image_file:
-                    image_file.write(image_bytes)
-
-                image_paths.append(image_filename)
-
-        pdf_document.close()
-
-        if image_paths:
-            zip_path = os.path.join(get_base_drive_path(), "output_files", f"{base_name}_images.zip")
-            with zipfile.ZipFile(zip_path, 'w') as zipf:
-                for img_path in image_paths:
-                    zipf.write(img_path, os.path.basename(img_path))
-
-            print(f"✅ {len(image_paths)} imagens extraídas do PDF: {zip_path}")
+        # Listar as imagens é barato (nada é decodificado): feito aqui, para deduplicar por xref
+        occurrences = OrderedDict()  # xref -> [(página, índice na página)]
+        skipped = 0
+        with fitz.open(pdf_path) as doc:
+            total_pages = doc.page_count
+            for page_num in range(total_pages):
+                for img_index, img in enumerate(doc[page_num].get_images(full=True)):
+                    xref, width, height = img[0], img[2], img[3]
+                    if width < min_size or height < min_size or width * height < min_area:
+                        skipped += 1
+                        continue
+                    occurrences.setdefault(xref, []).append((page_num + 1, img_index + 1))
+
+        # Cada xref é extraído pelo worker responsável pelo bloco de páginas da sua primeira ocorrência
+        chunks = _page_chunks(total_pages)
+        xrefs_by_chunk = [[] for _ in chunks]
+        for xref, pages in occurrences.items():
+            first_page = pages[0][0]
+            xrefs_by_chunk[(first_page - 1) // PAGES_PER_TASK].append(xref)
+
+        files_by_hash = {}
+        manifest = {'images': [], 'pages': {}}
+        with zipfile.ZipFile(zip_path, 'w') as zipf, \
+                _shared_document(pdf_path) as source, \
+                _progress_bar(total=len(occurrences), desc=f"Extraindo imagens de {os.path.basename(pdf_path)}") as pbar:
+            tasks = [ (source, xrefs) for xrefs in xrefs_by_chunk if xrefs ]
+            for extracted in _pool_map(_extract_image_xrefs, tasks):
+                for xref, image_ext, digest, image_bytes in extracted:
+                    entry = files_by_hash.get(digest)
+                    if entry is None:
+                        page_num, img_index = occurrences[xref][0]
+                        image_filename = f"pagina_{page_num}_img_{img_index}.{image_ext}"
+                        archive_add_bytes(zipf, image_filename, image_bytes)
+                        if keep_files:
+                            with open(os.path.join(images_dir, image_filename), "wb") as image_file:
+                                image_file.write(image_bytes)
+                        entry = {'file': image_filename, 'sha256': digest, 'xrefs': [], 'pages': []}
+                        files_by_hash[digest] = entry
+                        manifest['images'].append(entry)
+                    entry['xrefs'].append(xref)
+                    for page_num, _ in occurrences[xref]:
+                        entry['pages'].append(page_num)
+                        manifest['pages'].setdefault(str(page_num), []).append(entry['file'])
+                pbar.update(len(extracted))
+
+            for entry in manifest['images']:
+                entry['pages'] = sorted(set(entry['pages']))
+            manifest['pages'] = {page: sorted(set(files)) for page, files in sorted(manifest['pages'].items(), key=lambda item: int(item[0]))}
+            if manifest['images']:
+                archive_add_bytes(zipf, "manifest.json", json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+
+        if manifest['images']:
+            total_occurrences = sum(len(pages) for pages in occurrences.values())
+            print(f"✅ {len(manifest['images'])} imagens únicas extraídas do PDF ({total_occurrences} ocorrências): {zip_path}")
+            if skipped:
+                print(f"   {skipped} ocorrência(s) abaixo do tamanho mínimo ignorada(s)")
             return zip_path
         else:
+            os.remove(zip_path)
             print("ℹ️ Nenhuma imagem encontrada no PDF")
             return None
 
@@ -339,21 +2024,65 @@ def extract_images_from_pdf(pdf_path):
         print(f"❌ Erro na extração de imagens: {str(e)}")
         return None
 
-def merge_pdfs(pdf_files):
-    """Mescla múltiplos PDFs em um único arquivo usando PyMuPDF (fitz) com barra de progresso"""
-    output_path = os.path.join(get_base_drive_path(), "output_files", "merged_document.pdf")
+MERGE_FLUSH_EVERY = 64  # Entradas inseridas entre duas gravações do resultado parcial em disco
+MERGE_PREFETCH = 8      # Arquivos trazidos antecipadamente para o cache de disco do sistema
 
+def _warm_file(path):
+    """Ask the OS to read a file into its page cache (runs in an I/O thread); returns the path."""
+    with open(path, 'rb') as f:
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+        else:
+            while f.read(1024 * 1024):
+                pass
+    return path
+
+def _prefetch_files(paths, executor, window=None):
+    """Yield paths in order while up to window of the following files are warmed in I/O threads."""
+    yield from _iter_ordered(executor, _warm_file, list(paths), window or MERGE_PREFETCH)
+
+@_cached_conversion
+def merge_pdfs(pdf_files, output_name="merged_document.pdf", flush_every=None, output_dir=None):
+    """Mescla múltiplos PDFs em um único arquivo usando PyMuPDF (fitz) com barra de progresso
+
+    As entradas são abertas pelo caminho, uma de cada vez, enquanto threads de I/O trazem as
+    MERGE_PREFETCH seguintes para o cache de disco. A cada flush_every entradas (padrão
+    MERGE_FLUSH_EVERY) o resultado parcial é gravado em disco de forma incremental e reaberto a
+    partir do arquivo, de modo que só os objetos do lote atual ficam em memória. O salvamento
+    final deduplica fontes e imagens idênticas (garbage=4) e, por isso, ainda percorre todos os
+    objetos do resultado. output_name define o nome do arquivo gerado em output_files.
+    """
+    import fitz
+    flush_every = max(1, flush_every or MERGE_FLUSH_EVERY)
+    output_name = os.path.basename(output_name) or "merged_document.pdf"
+    if not output_name.lower().endswith('.pdf'):
+        output_name += '.pdf'
+    output_files_dir = _output_dir(output_dir)
+    output_path = os.path.join(output_files_dir, output_name)
+    partial_path = os.path.join(output_files_dir, f".{output_name}.parcial")
+
+    output_pdf = None
     try:
+        paths = list(pdf_files)
         output_pdf = fitz.open()
-
-        for pdf_file in tqdm(pdf_files, desc="Mesclando PDFs"):
-            input_pdf = fitz.open(pdf_file)
-            output_pdf.insert_pdf(input_pdf)
-            input_pdf.close()
-
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        output_pdf.save(output_path)
-        output_pdf.close()
+        pending = 0
+        with ThreadPoolExecutor(max_workers=MERGE_PREFETCH) as executor, \
+                _progress_bar(total=len(paths), desc="Mesclando PDFs") as pbar:
+            for path in _prefetch_files(paths, executor):
+                with fitz.open(path) as input_pdf:
+                    output_pdf.insert_pdf(input_pdf)
+                pending += 1
+                pbar.update(1)
+                if pending == flush_every and path != paths[-1]:
+                    # Grava só os objetos novos e reabre pelo arquivo: o lote sai da memória
+                    if output_pdf.name:
+                        output_pdf.save(partial_path, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP)
+                    else:
+                        output_pdf.save(partial_path)
+                    output_pdf.close()
+                    output_pdf = fitz.open(partial_path)
+                    pending = 0
+        output_pdf.save(output_path, garbage=4, deflate=True, clean=True)
 
         print(f"✅ {len(pdf_files)} PDFs mesclados em: {output_path}")
         return output_path
@@ -362,94 +2091,613 @@ def merge_pdfs(pdf_files):
         print(f"❌ Erro ao mesclar PDFs com fitz: {str(e)}")
         return None
 
-def split_pdf(pdf_path):
-    """Divide um PDF em páginas individuais usando PyMuPDF (fitz) com barra de progresso"""
+    finally:
+        if output_pdf is not None:
+            output_pdf.close()
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+SPLIT_MODES = ('pages', 'ranges', 'every', 'bookmarks', 'size')
+
+def _parse_page_ranges(ranges, total_pages):
+    """Parse '1-3,5,8-' into [(1, 3), (5, 5), (8, total_pages)]."""
+    parsed = []
+    for item in str(ranges).split(','):
+        item = item.strip()
+        if not item:
+            continue
+        match = re.fullmatch(r'(\d*)\s*-\s*(\d*)|(\d+)', item)
+        if not match:
+            raise ValueError(f"Intervalo de páginas inválido: {item}")
+        if match.group(3):
+            first = last = int(match.group(3))
+        else:
+            first = int(match.group(1) or 1)
+            last = int(match.group(2) or total_pages)
+        if not 1 <= first <= last <= total_pages:
+            raise ValueError(f"Intervalo fora do documento (1-{total_pages}): {item}")
+        parsed.append((first, last))
+    if not parsed:
+        raise ValueError("Nenhum intervalo de páginas informado")
+    return parsed
+
+def _estimate_page_sizes(doc):
+    """Rough per-page byte weights: content stream size plus each image's stored size.
+
+    Returns a list of (content_bytes, {image_xref: image_bytes}) so callers can count an image
+    shared by several pages only once per output part.
+    """
+    image_sizes = {}
+    estimates = []
+    for page in doc:
+        images = {}
+        for img in page.get_images(full=True):
+            xref = img[0]
+            if xref not in image_sizes:
+                try:
+                    image_sizes[xref] = int(doc.xref_get_key(xref, 'Length')[1])
+                except (ValueError, RuntimeError):
+                    image_sizes[xref] = 0
+            images[xref] = image_sizes[xref]
+        estimates.append((len(page.read_contents() or b''), images))
+    return estimates
+
+def _split_plan(doc, mode, ranges=None, every=None, max_bytes=None):
+    """Return the output parts of a split as (file name, first_page, last_page), pages 1-based."""
+    total_pages = doc.page_count
+    if mode == 'pages':
+        return [(f"pagina_{page_num}.pdf", page_num, page_num) for page_num in range(1, total_pages + 1)]
+
+    if mode == 'ranges':
+        spans = _parse_page_ranges(ranges, total_pages)
+    elif mode == 'every':
+        if not every or every < 1:
+            raise ValueError("Informe every >= 1 para dividir a cada N páginas")
+        spans = [(first, min(first + every - 1, total_pages)) for first in range(1, total_pages + 1, every)]
+    elif mode == 'bookmarks':
+        titles = {}
+        for level, title, page in doc.get_toc(simple=True):
+            if level == 1 and 1 <= page <= total_pages:
+                titles.setdefault(page, title)
+        starts = sorted(titles)
+        if not starts:
+            print("ℹ️ O PDF não tem marcadores; dividindo por páginas.")
+            return _split_plan(doc, 'pages')
+        if starts[0] != 1:
+            starts.insert(0, 1)
+            titles.setdefault(1, 'inicio')
+        spans = [(first, (starts[i + 1] - 1) if i + 1 < len(starts) else total_pages) for i, first in enumerate(starts)]
+        parts = []
+        for index, (first, last) in enumerate(spans):
+            slug = re.sub(r'[^\w-]+', '_', titles.get(first, ''), flags=re.UNICODE).strip('_')[:60] or f"paginas_{first}-{last}"
+            parts.append((f"parte_{index + 1}_{slug}.pdf", first, last))
+        return parts
+    elif mode == 'size':
+        if not max_bytes or max_bytes < 1:
+            raise ValueError("Informe max_bytes para dividir por tamanho")
+        spans = []
+        first, size, seen = 1, 0, set()
+        for page_num, (content_bytes, images) in enumerate(_estimate_page_sizes(doc), start=1):
+            page_size = content_bytes + sum(image_bytes for xref, image_bytes in images.items() if xref not in seen)
+            if page_num > first and size + page_size > max_bytes:
+                spans.append((first, page_num - 1))
+                first, size, seen = page_num, 0, set()
+                page_size = content_bytes + sum(images.values())
+            size += page_size
+            seen.update(images)
+        spans.append((first, total_pages))
+    else:
+        raise ValueError(f"Modo de divisão desconhecido: {mode} (use um de {', '.join(SPLIT_MODES)})")
+
+    return [(f"parte_{index + 1}_paginas_{first}-{last}.pdf", first, last) for index, (first, last) in enumerate(spans)]
+
+def _group_parts(parts, pages_per_task=None):
+    """Group split parts into tasks of roughly pages_per_task pages each."""
+    pages_per_task = pages_per_task or PAGES_PER_TASK
+    groups, current, current_pages = [], [], 0
+    for part in parts:
+        current.append(part)
+        current_pages += part[2] - part[1] + 1
+        if current_pages >= pages_per_task:
+            groups.append(current)
+            current, current_pages = [], 0
+    if current:
+        groups.append(current)
+    return groups
+
+@_cached_conversion
+def split_pdf(pdf_path, mode='pages', ranges=None, every=None, max_bytes=None, keep_files=False, output_dir=None):
+    """Divide um PDF em vários arquivos usando PyMuPDF (fitz) com processamento paralelo
+
+    mode='pages' (padrão) gera um arquivo por página; 'ranges' usa intervalos como '1-3,5,8-';
+    'every' divide a cada N páginas (every=N); 'bookmarks' cria uma parte por marcador de primeiro
+    nível; 'size' agrupa páginas em partes de aproximadamente max_bytes bytes (estimativa pelo
+    conteúdo e imagens de cada página). As partes são montadas em paralelo, com cada worker abrindo
+    o PDF de origem uma única vez, e vão direto da memória para o ZIP; com keep_files=True também
+    são gravadas em disco.
+    """
+    import fitz
     base_name = os.path.basename(pdf_path).replace('.pdf', '')
-    output_dir = os.path.join(get_base_drive_path(), "output_files", f"{base_name}_pages")
-    os.makedirs(output_dir, exist_ok=True)
+    parts_dir = os.path.join(_output_dir(output_dir), f"{base_name}_pages")
+    zip_path = os.path.join(_output_dir(output_dir), f"{base_name}_pages.zip")
+    os.makedirs(parts_dir if keep_files else os.path.dirname(zip_path), exist_ok=True)
 
     try:
-        doc = fitz.open(pdf_path)
-        total_pages = len(doc)
-
-        individual_files = []
-
-        for i in tqdm(range(total_pages), desc=f"Dividindo {base_name}"):
-            output_pdf = fitz.open()
-            output_pdf.insert_pdf(doc, from_page=i, to_page=i)
-
-            output_file = os.path.join(output_dir, f"pagina_{i+1}.pdf")
-            output_pdf.save(output_file)
-            output_pdf.close()
-
-            individual_files.append(output_file)
-
-        doc.close()
-
-        zip_path = os.path.join(get_base_drive_path(), "output_files", f"{base_name}_pages.zip")
-        with zipfile.ZipFile(zip_path, 'w') as zipf:
-            for file_path in individual_files:
-                zipf.write(file_path, os.path.basename(file_path))
-
-        print(f"✅ PDF dividido em {total_pages} páginas individuais com fitz: {zip_path}")
+        with fitz.open(pdf_path) as doc:
+            parts = _split_plan(doc, mode, ranges=ranges, every=every, max_bytes=max_bytes)
+
+        with zipfile.ZipFile(zip_path, 'w') as zipf, \
+                _shared_document(pdf_path) as source, \
+                _progress_bar(total=len(parts), desc=f"Dividindo {base_name}") as pbar:
+            tasks = [(source, group) for group in _group_parts(parts)]
+            for built in _pool_map(_split_parts, tasks):
+                for name, part_bytes in built:
+                    archive_add_bytes(zipf, name, part_bytes)
+                    if keep_files:
+                        with open(os.path.join(parts_dir, name), 'wb') as part_file:
+                            part_file.write(part_bytes)
+                pbar.update(len(built))
+
+        print(f"✅ PDF dividido em {len(parts)} arquivo(s) com fitz: {zip_path}")
         return zip_path
 
     except Exception as e:
         print(f"❌ Erro ao dividir PDF com fitz: {str(e)}")
         return None
 
-def compress_pdf(pdf_path):
-    """Comprime um PDF reduzindo qualidade de imagens com barra de progresso"""
-    output_path = os.path.join(get_base_drive_path(), "output_files", os.path.basename(pdf_path).replace('.pdf', '_compressed.pdf'))
+COMPRESSION_PRESETS = {
+    'screen': {'dpi': 72, 'quality': 40},
+    'ebook': {'dpi': 150, 'quality': 60},
+    'printer': {'dpi': 300, 'quality': 85},
+}
+COMPRESSION_IMAGE_FORMATS = ('jpeg', 'jpeg2000', 'bilevel')
+
+@_cached_conversion
+def compress_pdf(pdf_path, preset='ebook', image_format='jpeg', return_report=False, output_dir=None):
+    """Comprime um PDF reamostrando e recodificando as imagens, com barra de progresso
+
+    Cada imagem única (por xref) é processada uma única vez, em paralelo: se a resolução efetiva
+    com que aparece na página passar do DPI do preset, ela é reduzida, e então recodificada com a
+    qualidade do preset. Presets: 'screen' (72 DPI, qualidade 40), 'ebook' (150 DPI, 60) e
+    'printer' (300 DPI, 85). image_format pode ser 'jpeg', 'jpeg2000' ou 'bilevel' (PNG de 1 bit
+    para digitalizações em tons de cinza; imagens coloridas continuam em JPEG). Imagens com máscara
+    de transparência são mantidas, e uma imagem só é substituída se ficar menor. Com
+    return_report=True a função retorna (caminho, relatório) com os bytes economizados por imagem
+    e por página (uma imagem repetida conta na primeira página em que aparece).
+    """
+    import fitz
+    if preset not in COMPRESSION_PRESETS:
+        raise ValueError(f"Preset de compressão desconhecido: {preset} (use um de {', '.join(COMPRESSION_PRESETS)})")
+    if image_format not in COMPRESSION_IMAGE_FORMATS:
+        raise ValueError(f"Formato de imagem desconhecido: {image_format} (use um de {', '.join(COMPRESSION_IMAGE_FORMATS)})")
+
+    output_path = os.path.join(_output_dir(output_dir), os.path.basename(pdf_path).replace('.pdf', '_compressed.pdf'))
+    target_dpi, quality = COMPRESSION_PRESETS[preset]['dpi'], COMPRESSION_PRESETS[preset]['quality']
+    report = {'preset': preset, 'image_format': image_format, 'images': [], 'pages': []}
 
     try:
         doc = fitz.open(pdf_path)
-        total_pages = len(doc)
-
-        for i in tqdm(range(total_pages), desc=f"Comprimindo {os.path.basename(pdf_path)}"):
-            page = doc[i]
-            # The actual compression happens on doc.save, this loop is just for progress indication.
-
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        doc.save(output_path, garbage=4, deflate=True, clean=True, super_fast=True)
-        doc.close()
+        try:
+            # Resolução efetiva de cada imagem: a maior entre as suas ocorrências, para não degradar nenhuma
+            images = OrderedDict()  # xref -> {'pages', 'width', 'height', 'dpi'}
+            for page in doc:
+                for img in page.get_images(full=True):
+                    xref, smask, width, height = img[0], img[1], img[2], img[3]
+                    if smask or width * height == 0:
+                        continue
+                    info = images.setdefault(xref, {'pages': [], 'width': width, 'height': height, 'dpi': 0.0})
+                    info['pages'].append(page.number + 1)
+                    for rect in page.get_image_rects(xref):
+                        if rect.width > 0 and rect.height > 0:
+                            info['dpi'] = max(info['dpi'], width * 72.0 / rect.width, height * 72.0 / rect.height)
+
+            items = [(xref, target_dpi / info['dpi'] if info['dpi'] > target_dpi else 1.0) for xref, info in images.items()]
+            page_savings = {}
+            with _shared_document(pdf_path) as source, \
+                    _progress_bar(total=len(items), desc=f"Comprimindo {os.path.basename(pdf_path)}") as pbar:
+                tasks = [(source, items[i:i + PAGES_PER_TASK], image_format, quality) for i in range(0, len(items), PAGES_PER_TASK)]
+                for recompressed in _pool_map(_recompress_image_xrefs, tasks):
+                    for xref, new_width, new_height, image_bytes in recompressed:
+                        info = images[xref]
+                        original_bytes = len(doc.xref_stream_raw(xref) or b'')
+                        new_bytes = original_bytes
+                        if image_bytes is not None and len(image_bytes) < original_bytes:
+                            doc[info['pages'][0] - 1].replace_image(xref, stream=image_bytes)
+                            new_bytes = len(doc.xref_stream_raw(xref) or b'')
+                        report['images'].append({
+                            'xref': xref,
+                            'pages': sorted(set(info['pages'])),
+                            'original_size': [info['width'], info['height']],
+                            'new_size': [new_width, new_height] if new_bytes != original_bytes else [info['width'], info['height']],
+                            'dpi': round(info['dpi'], 1),
+                            'original_bytes': original_bytes,
+                            'new_bytes': new_bytes,
+                            'saved_bytes': original_bytes - new_bytes,
+                        })
+                        page_savings[info['pages'][0]] = page_savings.get(info['pages'][0], 0) + original_bytes - new_bytes
+                    pbar.update(len(recompressed))
+
+            report['pages'] = [{'page': page_num, 'saved_bytes': page_savings.get(page_num, 0)} for page_num in range(1, doc.page_count + 1)]
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            doc.save(output_path, garbage=4, deflate=True, clean=True)
+        finally:
+            doc.close()
 
         original_size = os.path.getsize(pdf_path) / 1024 # KB
         new_size = os.path.getsize(output_path) / 1024 # KB
         reduction = ((original_size - new_size) / original_size) * 100
+        report.update(original_bytes=os.path.getsize(pdf_path), new_bytes=os.path.getsize(output_path))
 
         print(f"✅ PDF comprimido: {output_path}")
         print(f"   Tamanho original: {original_size:.2f} KB")
         print(f"   Novo tamanho: {new_size:.2f} KB")
         print(f"   Redução: {reduction:.1f}%")
+        print(f"   Imagens recomprimidas: {sum(1 for entry in report['images'] if entry['saved_bytes'] > 0)} de {len(report['images'])} ({sum(entry['saved_bytes'] for entry in report['images']) / 1024:.2f} KB economizados)")
 
-        return output_path
+        return (output_path, report) if return_report else output_path
 
     except Exception as e:
         print(f"❌ Erro na compressão: {str(e)}")
-        return None
+        return (None, report) if return_report else None
 
-def pdf_to_csv_conversion(pdf_path):
+@_cached_conversion
+def pdf_to_csv_conversion(pdf_path, output_dir=None):
     """Extrai tabelas do PDF para CSV"""
-    converted_csv_paths = []
-    output_dir = os.path.join(get_base_drive_path(), "output_files")
-    os.makedirs(output_dir, exist_ok=True)
+    output_dir = _output_dir(output_dir)
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            tables_found = 0
-            for i, page in enumerate(pdf.pages):
-                tables = page.extract_tables()
-                for j, table in enumerate(tables):
-                    if table:
-                        df = pd.DataFrame(table)
-                        csv_path = os.path.join(output_dir, os.path.basename(pdf_path).replace('.pdf', f'_page{i+1}_table{j+1}.csv'))
-                        df.to_csv(csv_path, index=False, encoding='utf-8')
-                        converted_csv_paths.append(csv_path)
-                        tables_found += 1
-                        print(f"✅ Tabela salva como CSV: {csv_path}")
-            if tables_found == 0:
-                print("ℹ️ Nenhuma tabela encontrada para exportar para CSV.")
-            return converted_csv_paths
+        converted_csv_paths = _write_tables_csv(extract_tables(pdf_path), pdf_path, output_dir)
+        if not converted_csv_paths:
+            print("ℹ️ Nenhuma tabela encontrada para exportar para CSV.")
+        return converted_csv_paths
     except Exception as e:
         print(f"❌ Erro na extração para CSV: {str(e)}")
         return []
+
+@_cached_conversion
+def pdf_to_parquet(pdf_path, output_dir=None):
+    """Extrai tabelas do PDF para um arquivo Parquet (formato longo: página, tabela, linha, coluna, valor)"""
+    output_path = os.path.join(_output_dir(output_dir), os.path.basename(pdf_path).replace('.pdf', '_tables.parquet'))
+
+    try:
+        if _write_tables_parquet(extract_tables(pdf_path), output_path):
+            print(f"✅ Tabelas extraídas para Parquet: {output_path}")
+            return output_path
+        else:
+            print("ℹ️ Nenhuma tabela encontrada no PDF")
+            return None
+
+    except ImportError:
+        print("❌ Erro: a saída Parquet requer o pacote 'pyarrow' (pip install pyarrow)")
+        return None
+    except Exception as e:
+        print(f"❌ Erro na extração para Parquet: {str(e)}")
+        return None
+
+# ==================== PIPELINE ÚNICO (CONVERTER TODAS AS OPÇÕES) ====================
+CONVERT_ALL_OUTPUTS = ('text', 'word', 'excel', 'images', 'html', 'pdfa', 'ocr', 'csv')
+
+@_cached_conversion(key_params=_convert_all_key)
+def convert_all(pdf_path, outputs=CONVERT_ALL_OUTPUTS, output_dir=None):
+    """Converte o PDF para vários formatos lendo e rasterizando cada página uma única vez
+
+    Texto, tabelas, imagens e OCR são produzidos página a página pelos workers em uma única
+    passada, e cada resultado é distribuído para os escritores pedidos (TXT, HTML, Excel, CSV,
+    imagens e OCR). Word e PDF/A dependem de ferramentas que processam o documento inteiro e
+    são executados em seguida. Retorna a lista de arquivos gerados.
+    """
+    import fitz
+    unknown = set(outputs) - set(CONVERT_ALL_OUTPUTS)
+    if unknown:
+        raise ValueError(f"Saídas desconhecidas: {', '.join(sorted(unknown))}")
+
+    base_name = os.path.basename(pdf_path).replace('.pdf', '')
+    output_files_dir = _output_dir(output_dir)
+    os.makedirs(output_files_dir, exist_ok=True)
+    converted_files = []
+
+    page_outputs = [name for name in outputs if name in ('text', 'excel', 'csv', 'images', 'html', 'ocr')]
+    if page_outputs:
+        options = {
+            'text': 'text' in outputs or 'html' in outputs,
+            'tables': 'excel' in outputs or 'csv' in outputs,
+            'images_dpi': RENDER_PROFILES['default']['dpi'] if 'images' in outputs else None,
+            'images_quality': RENDER_PROFILES['default']['quality'],
+            'ocr_dpi': RENDER_PROFILES['ocr']['dpi'] if 'ocr' in outputs else None,
+            'ocr_colorspace': RENDER_PROFILES['ocr']['colorspace'],
+            'lang': 'por+eng',
+            'skip_text_pages': True,
+            'engine': RASTER_ENGINE,
+        }
+        text_path = os.path.join(output_files_dir, f"{base_name}.txt")
+        html_path = os.path.join(output_files_dir, f"{base_name}.html")
+        images_zip_path = os.path.join(output_files_dir, f"{base_name}_images.zip")
+
+        text_file = html_file = ocr_state = images_zip = None
+        tables = []
+        converted_images = 0
+        failed_pages = 0
+        try:
+            with fitz.open(pdf_path) as doc:
+                total_pages = doc.page_count
+
+            if 'text' in outputs:
+                text_file = open(text_path, 'w', encoding='utf-8')
+            if 'html' in outputs:
+                html_file = open(html_path, 'w', encoding='utf-8')
+                html_file.write(_HTML_HEADER)
+            if 'images' in outputs:
+                images_zip = zipfile.ZipFile(images_zip_path, 'w')
+            if 'ocr' in outputs:
+                ocr_state = _open_ocr_output(pdf_path, output_files_dir, 'searchable')
+
+            with _shared_document(pdf_path) as source, \
+                    _progress_bar(total=total_pages, desc=f"Convertendo {base_name} (todas as opções)") as pbar:
+                tasks = [ (source, first, last, options) for first, last in _page_chunks(total_pages) ]
+                for page_results in _pool_map(_analyze_page_range, tasks):
+                    for result in page_results:
+                        page_num = result['page']
+                        if result['error']:
+                            print(f"❌ Erro na página {page_num}: {result['error']}")
+                        elif result['ocr'] and result['ocr']['error']:
+                            print(f"❌ Erro no OCR da página {page_num}: {result['ocr']['error']}")
+                        if result['error'] or (result['ocr'] and result['ocr']['error']):
+                            failed_pages += 1
+                        if text_file:
+                            text_file.write(result['text'])
+                        if html_file:
+                            html_file.write(_html_page(page_num, result['text']))
+                        for table_index, rows in enumerate(result['tables']):
+                            tables.append((page_num, table_index + 1, rows))
+                        if result['image'] is not None:
+                            archive_add_bytes(images_zip, f"pagina_{page_num}.jpg", result['image'])
+                            converted_images += 1
+                        if ocr_state:
+                            _write_ocr_page(ocr_state, result['ocr'] or {'page': page_num, 'text': '', 'words': [], 'method': 'ocr', 'error': result['error']})
+                    pbar.update(len(page_results))
+
+            if text_file:
+                text_file.close()
+                converted_files.append(text_path)
+                print(f"✅ PDF convertido para texto: {text_path}")
+            if html_file:
+                html_file.write(_HTML_FOOTER)
+                html_file.close()
+                converted_files.append(html_path)
+                print(f"✅ PDF convertido para HTML: {html_path}")
+            if 'excel' in outputs:
+                excel_path = _write_tables_excel(tables, os.path.join(output_files_dir, f"{base_name}.xlsx"))
+                if excel_path:
+                    converted_files.append(excel_path)
+                    print(f"✅ Tabelas extraídas para Excel: {excel_path}")
+                else:
+                    print("ℹ️ Nenhuma tabela encontrada no PDF")
+            if 'csv' in outputs:
+                converted_files.extend(_write_tables_csv(tables, pdf_path, output_files_dir))
+            if images_zip:
+                images_zip.close()
+                images_zip = None
+                if converted_images:
+                    converted_files.append(images_zip_path)
+                    print(f"✅ PDF convertido para {converted_images} imagens: {images_zip_path}")
+                else:
+                    os.remove(images_zip_path)
+            if ocr_state:
+                converted_files.append(_close_ocr_output(ocr_state))
+                ocr_state = None
+                print(f"✅ PDF pesquisável com OCR criado: {converted_files[-1]}")
+            if failed_pages:
+                _mark_incomplete()
+                print(f"⚠️ {failed_pages} página(s) falharam; o resultado não foi guardado no cache")
+
+        except Exception as e:
+            _mark_incomplete()
+            print(f"❌ Erro no pipeline de conversão: {str(e)}")
+            for open_file in (text_file, html_file, images_zip):
+                if open_file:
+                    open_file.close()
+            if ocr_state:
+                _close_ocr_output(ocr_state, save=False)
+
+    # Conversões que processam o documento inteiro com ferramentas próprias
+    for name, func in (('word', pdf_to_word), ('pdfa', pdf_to_pdfa)):
+        if name in outputs:
+            result = func(pdf_path, output_dir=output_dir)
+            if result:
+                converted_files.append(result)
+            else:
+                _mark_incomplete()
+
+    return converted_files
+
+# ==================== AGENDADOR DE CONVERSÕES ====================
+# As conversões escolhidas para um lote de arquivos viram um grafo de tarefas. Todo o trabalho
+# pesado roda no pool de workers compartilhado, cujo tamanho (WORKER_POOL_SIZE) é o orçamento
+# global de CPU:
+#   'pool'  - a conversão inteira roda dentro de um worker (ferramentas seriais como o PDF/A)
+#   'pages' - a conversão é coordenada por uma thread e distribui suas páginas pelo mesmo pool
+# Assim as ferramentas seriais ocupam núcleos enquanto o OCR roda, sem que o paralelismo por
+# página de uma conversão crie processos além do orçamento. O Word também é 'pages': as páginas
+# são analisadas no pool e o .docx é montado pela thread coordenadora.
+CONVERSION_MENU_OPTIONS = {
+    '1': 'text', '2': 'word', '3': 'excel', '4': 'images', '5': 'html', '6': 'pdfa', '7': 'ocr',
+    '8': 'extract_images', '9': 'csv', '10': 'merge', '11': 'split', '12': 'compress', '13': 'all',
+    '14': 'parquet',
+}
+
+_CONVERSIONS = {
+    'text': (pdf_to_text, 'pages'),
+    'word': (pdf_to_word, 'pages'),
+    'tables': (extract_tables, 'pages'),
+    'excel': (pdf_to_excel, 'pages'),
+    'images': (pdf_to_images, 'pages'),
+    'html': (pdf_to_html, 'pages'),
+    'pdfa': (pdf_to_pdfa, 'pool'),
+    'ocr': (pdf_ocr, 'pages'),
+    'extract_images': (extract_images_from_pdf, 'pages'),
+    'csv': (pdf_to_csv_conversion, 'pages'),
+    'parquet': (pdf_to_parquet, 'pages'),
+    'merge': (merge_pdfs, 'pool'),
+    'split': (split_pdf, 'pages'),
+    'compress': (compress_pdf, 'pages'),
+    'all': (convert_all, 'pages'),
+}
+
+# Dependências entre conversões do mesmo arquivo: nome -> etapas que precisam terminar antes.
+# Etapas internas são incluídas automaticamente quando alguma conversão pedida depende delas e
+# não geram arquivos. Excel, CSV e Parquet leem o conjunto de tabelas extraído uma única vez.
+CONVERSION_DEPENDENCIES = {
+    'excel': ('tables',),
+    'csv': ('tables',),
+    'parquet': ('tables',),
+}
+_INTERNAL_STAGES = {'tables'}
+
+def _worker_settings():
+    """Module settings a pool worker needs to run a conversion exactly like this process would."""
+    return {
+        'GLOBAL_BASE_DRIVE_PATH': GLOBAL_BASE_DRIVE_PATH,
+        'RASTER_ENGINE': RASTER_ENGINE,
+        'DOCUMENT_SHARING': DOCUMENT_SHARING,
+        'CACHE_ENABLED': CACHE_ENABLED,
+        'CACHE_MAX_BYTES': CACHE_MAX_BYTES,
+        'CACHE_DIR': CACHE_DIR,
+        'PAGE_STORE_PATH': PAGE_STORE_PATH,
+        'OCR_MIN_TEXT_CHARS': OCR_MIN_TEXT_CHARS,
+        'OCR_MIN_IMAGE_COVERAGE': OCR_MIN_IMAGE_COVERAGE,
+        'OCR_MAX_TEXT_COVERAGE': OCR_MAX_TEXT_COVERAGE,
+        'ARCHIVE_COMPRESSION': ARCHIVE_COMPRESSION,
+        'ARCHIVE_DEFAULT_COMPRESSION': ARCHIVE_DEFAULT_COMPRESSION,
+    }
+
+def _run_conversion_in_worker(func, args, kwargs, settings):
+    """Pool task: apply the caller's settings, then run a whole conversion in this worker.
+
+    Returns (result, io_report) so the caller can account for the worker's file I/O.
+    """
+    globals().update(settings)
+    with io_accounting() as io_report:
+        result = func(*args, **kwargs)
+    return result, io_report
+
+def _run_conversion(func, mode, args, kwargs):
+    if mode == 'pool':
+        try:
+            result, io_report = get_worker_pool().submit(_run_conversion_in_worker, func, args, kwargs, _worker_settings()).result()
+        except BrokenProcessPool:
+            # Descarta o pool quebrado para que as próximas conversões subam um novo
+            shutdown_worker_pool(wait=False)
+            raise
+        _merge_io_report(io_report)
+        return result
+    return func(*args, **kwargs)
+
+def _run_task_graph(tasks, max_parallel):
+    """Run {task_id: (callable, deps)} respecting dependencies, at most max_parallel at a time.
+
+    A task whose dependency failed (raised or returned None) is skipped. Returns {task_id: result}.
+    """
+    results = {}
+    pending = dict(tasks)
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_parallel) as threads:
+        while pending or running:
+            for task_id, (call, deps) in list(pending.items()):
+                if any(dep in pending or dep in running.values() for dep in deps):
+                    continue
+                del pending[task_id]
+                if any(results.get(dep) is None for dep in deps):
+                    print(f"⚠️ Tarefa ignorada porque uma dependência falhou: {task_id}")
+                    results[task_id] = None
+                    continue
+                running[threads.submit(call)] = task_id
+
+            if not running:
+                if pending:
+                    raise ValueError(f"Dependências circulares entre tarefas: {', '.join(map(str, pending))}")
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                task_id = running.pop(future)
+                try:
+                    results[task_id] = future.result()
+                except Exception as e:
+                    print(f"❌ Erro na tarefa {task_id}: {str(e)}")
+                    results[task_id] = None
+    return results
+
+def run_conversions(pdf_files, conversions, max_parallel=None, progress=None, output_dir=None, options=None):
+    """Executa as conversões escolhidas para todos os arquivos de forma concorrente
+
+    conversions aceita nomes ('text', 'ocr', ...) ou números do menu ('1', '7', ...). As tarefas
+    (arquivo x conversão) rodam como um grafo sobre o pool de workers compartilhado; 'all'
+    (opção 13) é dividido no pipeline por página, no Word e no PDF/A, que rodam em paralelo.
+    max_parallel limita quantas conversões ficam ativas ao mesmo tempo (padrão: tamanho do pool).
+    progress é um callback(etapa, concluído, total) que recebe o andamento de todas as tarefas
+    (padrão: o registrado com progress_callback na thread atual). output_dir grava os arquivos
+    gerados diretamente nessa pasta (padrão: output_files na pasta base). options passa argumentos
+    extras por conversão, por exemplo {'images': {'profile': 'thumbnail'}}.
+    Retorna a lista de arquivos gerados, na ordem dos arquivos e das conversões.
+    """
+    names = [CONVERSION_MENU_OPTIONS.get(str(name), name) for name in conversions]
+    unknown = [name for name in names if name not in _CONVERSIONS or name in _INTERNAL_STAGES]
+    if unknown:
+        raise ValueError(f"Conversões desconhecidas: {', '.join(map(str, unknown))}")
+
+    planned = {}
+
+    def add_task(task_id, name, args, kwargs=None):
+        planned[task_id] = (name, args, kwargs or {})
+
+    for name in names:
+        if name == 'merge':
+            add_task(('*', 'merge'), 'merge', (list(pdf_files),))
+    for file_index, pdf_file in enumerate(pdf_files):
+        for name in names:
+            if name == 'merge' or (file_index, name) in planned:
+                continue
+            if name == 'all':
+                page_outputs = tuple(output for output in CONVERT_ALL_OUTPUTS if output not in ('word', 'pdfa'))
+                add_task((file_index, 'all'), 'all', (pdf_file,), {'outputs': page_outputs})
+                add_task((file_index, 'word'), 'word', (pdf_file,))
+                add_task((file_index, 'pdfa'), 'pdfa', (pdf_file,))
+            else:
+                add_task((file_index, name), name, (pdf_file,))
+
+    for task_id, (name, args, kwargs) in planned.items():
+        kwargs.update((options or {}).get(name, {}))
+        if output_dir and name not in _INTERNAL_STAGES:
+            kwargs['output_dir'] = output_dir
+
+    for task_id, (name, args, kwargs) in list(planned.items()):
+        for dep in CONVERSION_DEPENDENCIES.get(name, ()):
+            if (task_id[0], dep) not in planned:
+                add_task((task_id[0], dep), dep, args)
+
+    progress = progress or getattr(_PROGRESS, 'callback', None)
+    io_report = getattr(_IO_CONTEXT, 'report', None)
+    tasks = {}
+    for task_id, (name, args, kwargs) in planned.items():
+        func, mode = _CONVERSIONS[name]
+        deps = tuple((task_id[0], dep) for dep in CONVERSION_DEPENDENCIES.get(name, ()) if (task_id[0], dep) in planned)
+        call = functools.partial(_run_conversion, func, mode, args, kwargs)
+        if progress is not None or io_report is not None:
+            label = name if task_id[0] == '*' else f"{os.path.basename(args[0])}: {name}"
+            call = functools.partial(_run_with_progress, progress, io_report, label, call)
+        tasks[task_id] = (call, deps)
+
+    results = _run_task_graph(tasks, max_parallel or WORKER_POOL_SIZE or os.cpu_count() or 1)
+
+    converted_files = []
+    for task_id in planned:
+        if task_id[1] in _INTERNAL_STAGES:
+            continue
+        result = results.get(task_id)
+        if isinstance(result, tuple):
+            result = result[0]
+        if isinstance(result, list):
+            converted_files.extend(result)
+        elif result:
+            converted_files.append(result)
+    return converted_files
+
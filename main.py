@@ -1,6 +1,11 @@
 import os
+import sys
+import glob
+import time
 import shutil
+import argparse
 import warnings
+from collections import OrderedDict
 
 # Ignorar warnings
 warnings.filterwarnings('ignore')
@@ -58,93 +63,42 @@ def main_converter():
 
             converted_files = []
 
-            if choice == '10':
-                if len(pdf_files) > 1:
-                    print(f"\n📄 Processando {len(pdf_files)} PDFs para mesclagem...")
-                    result = merge_pdfs(pdf_files) # Assumed to be in global scope from conversor.py
-                    if result:
-                        converted_files.append(result)
-                else:
-                    print("⚠️ É necessário pelo menos 2 PDFs para mesclar. Por favor, selecione mais arquivos.")
-
-            else:
-                for pdf_file in pdf_files:
-                    print(f"\n📄 Processando: {os.path.basename(pdf_file)}")
-
-                    if choice == '1':
-                        result = pdf_to_text(pdf_file) # Assumed to be in global scope from conversor.py
-                        if result: converted_files.append(result)
-
-                    elif choice == '2':
-                        result = pdf_to_word(pdf_file) # Assumed to be in global scope from conversor.py
-                        if result: converted_files.append(result)
-
-                    elif choice == '3':
-                        result = pdf_to_excel(pdf_file) # Assumed to be in global scope from conversor.py
-                        if result: converted_files.append(result)
-
-                    elif choice == '4':
-                        result = pdf_to_images(pdf_file) # Assumed to be in global scope from conversor.py
-                        if result: converted_files.append(result)
-
-                    elif choice == '5':
-                        result = pdf_to_html(pdf_file) # Assumed to be in global scope from conversor.py
-                        if result: converted_files.append(result)
-
-                    elif choice == '6':
-                        result = pdf_to_pdfa(pdf_file) # Assumed to be in global scope from conversor.py
-                        if result: converted_files.append(result)
-
-                    elif choice == '7':
-                        result = pdf_ocr(pdf_file) # Assumed to be in global scope from conversor.py
-                        if result: converted_files.append(result)
-
-                    elif choice == '8':
-                        result = extract_images_from_pdf(pdf_file) # Assumed to be in global scope from conversor.py
-                        if result: converted_files.append(result)
+            # Os resultados são gravados direto na subpasta do Drive escolhida, sem cópia posterior
+            drive_save_path = None
+            if COLAB_ENV and choice in CONVERSION_MENU_OPTIONS: # Assumed to be in global scope from utils.py
+                drive_save_path = ask_drive_subfolder(output_files_dir)
+
+            with io_accounting() as io_report: # Assumed to be in global scope from conversor.py
+                if choice == '10':
+                    if len(pdf_files) > 1:
+                        print(f"\n📄 Processando {len(pdf_files)} PDFs para mesclagem...")
+                        result = merge_pdfs(pdf_files, output_dir=drive_save_path) # Assumed to be in global scope from conversor.py
+                        if result:
+                            converted_files.append(result)
+                    else:
+                        print("⚠️ É necessário pelo menos 2 PDFs para mesclar. Por favor, selecione mais arquivos.")
 
-                    elif choice == '9':
-                        results_csv = pdf_to_csv_conversion(pdf_file) # Assumed to be in global scope from conversor.py
-                        if results_csv:
-                            converted_files.extend(results_csv)
+                elif choice in CONVERSION_MENU_OPTIONS: # Assumed to be in global scope from conversor.py
+                    for pdf_file in pdf_files:
+                        print(f"\n📄 Processando: {os.path.basename(pdf_file)}")
+                    if choice == '13':
+                        print("ℕ Convertendo para todos os formatos...")
 
-                    elif choice == '11':
-                        result = split_pdf(pdf_file) # Assumed to be in global scope from conversor.py
-                        if result: converted_files.append(result)
+                    # Arquivos e conversões rodam de forma concorrente sobre o pool de workers compartilhado
+                    converted_files.extend(run_conversions(pdf_files, [choice], output_dir=drive_save_path)) # Assumed to be in global scope from conversor.py
 
-                    elif choice == '12':
-                        result = compress_pdf(pdf_file) # Assumed to be in global scope from conversor.py
-                        if result: converted_files.append(result)
+                else:
+                    print("❌ Opção inválida! Por favor, escolha uma opção do menu.")
 
-                    elif choice == '13':
-                        print("ℕ Convertendo para todos os formatos...")
-                        conversions = [
-                            ('Texto', pdf_to_text),
-                            ('Word', pdf_to_word),
-                            ('Excel', pdf_to_excel),
-                            ('Imagens', pdf_to_images),
-                            ('HTML', pdf_to_html),
-                            ('PDF/A', pdf_to_pdfa),
-                            ('OCR', pdf_ocr)
-                        ]
-
-                        for name, func in conversions:
-                            print(f"\n  ℕ Convertendo para {name}...")
-                            result = func(pdf_file)
-                            if result:
-                                if isinstance(result, list):
-                                    converted_files.extend(result)
-                                else:
-                                    converted_files.append(result)
-                    else:
-                        print("❌ Opção inválida! Por favor, escolha uma opção do menu.")
-                        continue
+                if converted_files:
+                    print(f"\n✅ Total de {len(converted_files)} arquivo(s) convertido(s) com sucesso!")
 
-            if converted_files:
-                print(f"\n✅ Total de {len(converted_files)} arquivo(s) convertido(s) com sucesso!")
+                    # download_files agora sempre salva no Drive
+                    download_files(converted_files, output_files_dir, to_drive=True, drive_save_path=drive_save_path) # Assumed to be in global scope from utils.py
 
-                # download_files agora sempre salva no Drive
-                download_files(converted_files, output_files_dir, to_drive=True) # Assumed to be in global scope from utils.py
+            if io_report:
+                print("\n📊 Leitura e gravação de arquivos nesta conversão:")
+                print(format_io_report(io_report))
 
             print("\n🔧 Limpando arquivos temporários...")
             if os.path.exists(temp_files_dir):
@@ -171,3 +125,139 @@ def main_converter():
         except Exception as e:
             print(f"\n❌ Ocorreu um erro inesperado: {str(e)}")
             continue
+
+    # O pool de workers é compartilhado entre todas as iterações do menu; encerrá-lo só na saída
+    shutdown_worker_pool() # Assumed to be in global scope from conversor.py
+
+
+# ==================== MODO LINHA DE COMANDO (SEM INTERAÇÃO) ====================
+# Os PDFs são lidos onde estão (sem cópia para input_pdfs) e processados em paralelo pelo
+# agendador de conversões; com --watch, novos PDFs que chegarem às pastas são convertidos também.
+def _is_output_path(path):
+    """Arquivos gerados pelo próprio conversor (output_files, cache) nunca são tratados como entrada"""
+    base = os.path.abspath(BASE_DRIVE_PATH)
+    for folder in ("output_files", "cache", "jobs"):
+        if os.path.abspath(path).startswith(os.path.join(base, folder) + os.sep):
+            return True
+    return False
+
+def expand_inputs(patterns):
+    """Expande arquivos, padrões glob e diretórios (recursivamente) na lista de PDFs de entrada"""
+    pdf_files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, _, filenames in os.walk(pattern):
+                pdf_files.extend(os.path.join(root, filename) for filename in sorted(filenames) if filename.lower().endswith('.pdf'))
+        else:
+            pdf_files.extend(path for path in sorted(glob.glob(pattern, recursive=True)) if os.path.isfile(path) and path.lower().endswith('.pdf'))
+    unique = OrderedDict()
+    for path in pdf_files:
+        if not _is_output_path(path):
+            unique.setdefault(os.path.abspath(path))
+    return list(unique)
+
+def run_batch(pdf_files, conversions):
+    """Converte os PDFs (no lugar onde estão) e retorna a lista de arquivos gerados"""
+    for pdf_file in pdf_files:
+        print(f"\n📄 Processando: {os.path.basename(pdf_file)}")
+    with io_accounting() as io_report:
+        converted_files = run_conversions(pdf_files, conversions)
+    if converted_files:
+        print(f"\n✅ Total de {len(converted_files)} arquivo(s) convertido(s) com sucesso!")
+        for converted_file in converted_files:
+            print(f"- {converted_file}")
+    else:
+        print("\n⚠️ Nenhum arquivo foi convertido.")
+    if io_report:
+        print("📊 Leitura e gravação de arquivos neste lote:")
+        print(format_io_report(io_report))
+    return converted_files
+
+def watch_inputs(patterns, conversions, poll_interval=2.0, already_done=()):
+    """Observa as pastas/padrões por novos PDFs (ou PDFs alterados) e converte cada um quando chega
+
+    Usa varredura periódica (portável, funciona em pastas montadas como o Google Drive). Um arquivo
+    só é convertido quando seu tamanho e data de modificação ficam iguais entre duas varreduras,
+    para não pegar um PDF ainda sendo copiado.
+    """
+    def signature(path):
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime_ns
+
+    done = {path: signature(path) for path in already_done if os.path.exists(path)}
+    candidates = {}
+    print(f"\n👀 Observando {', '.join(patterns)} a cada {poll_interval:g} s (Ctrl+C para encerrar)...")
+    try:
+        while True:
+            ready = []
+            for path in expand_inputs(patterns):
+                try:
+                    current = signature(path)
+                except FileNotFoundError:
+                    continue
+                if done.get(path) == current:
+                    continue
+                if candidates.get(path) == current:
+                    ready.append(path)
+                else:
+                    candidates[path] = current
+            if ready:
+                for path in ready:
+                    done[path] = candidates.pop(path)
+                run_batch(ready, conversions)
+            time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        print("\n👋 Observação encerrada.")
+
+def cli(argv=None):
+    """Ponto de entrada da linha de comando; sem argumentos, abre o menu interativo"""
+    parser = argparse.ArgumentParser(
+        description="Conversor de PDF em lote. Sem argumentos, abre o menu interativo.",
+        epilog="Conversões: " + ", ".join(f"{number}={name}" for number, name in CONVERSION_MENU_OPTIONS.items()),
+    )
+    parser.add_argument('-f', '--files', nargs='+', metavar='ENTRADA', help='PDFs, padrões glob (entre aspas) ou diretórios')
+    parser.add_argument('-c', '--conversions', nargs='+', metavar='CONVERSÃO', help='Números do menu ou nomes (ex.: 1 7 ou text,ocr)')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='Número de processos do pool de workers (padrão: todos os núcleos)')
+    parser.add_argument('-o', '--base-dir', default=os.getcwd(), help='Pasta base para output_files e cache (padrão: pasta atual)')
+    parser.add_argument('--watch', action='store_true', help='Depois do lote inicial, continua observando as entradas e converte novos PDFs')
+    parser.add_argument('--poll-interval', type=float, default=2.0, help='Intervalo entre varreduras no modo --watch, em segundos')
+    args = parser.parse_args(argv)
+
+    override_get_base_drive_path(args.base_dir)
+    if args.workers:
+        set_worker_pool_size(args.workers)
+
+    if not args.files and not args.conversions:
+        main_converter()
+        return 0
+    if not args.files or not args.conversions:
+        parser.error("informe as entradas (-f) e as conversões (-c)")
+
+    conversions = [name.strip() for item in args.conversions for name in item.split(',') if name.strip()]
+    unknown = [name for name in conversions if name not in CONVERSION_MENU_OPTIONS and name not in CONVERSION_MENU_OPTIONS.values()]
+    if unknown:
+        parser.error(f"conversões desconhecidas: {', '.join(unknown)}")
+    if args.watch and any(CONVERSION_MENU_OPTIONS.get(name, name) == 'merge' for name in conversions):
+        parser.error("a mesclagem (10) não pode ser usada com --watch")
+
+    try:
+        pdf_files = expand_inputs(args.files)
+        converted_files = []
+        if pdf_files:
+            converted_files = run_batch(pdf_files, conversions)
+        elif not args.watch:
+            print("⚠️ Nenhum PDF encontrado nas entradas informadas.")
+        if args.watch:
+            watch_inputs(args.files, conversions, args.poll_interval, already_done=pdf_files)
+            return 0
+        return 0 if converted_files else 1
+    finally:
+        shutdown_worker_pool()
+
+if __name__ == '__main__' and '__file__' in globals():
+    # Executado como script (python main.py): importa o que o notebook carrega com exec().
+    # No notebook __file__ não existe, e o menu continua sendo chamado pela célula de execução.
+    from conversor import (CONVERSION_MENU_OPTIONS, run_conversions, merge_pdfs, set_global_base_drive_path,
+                           set_worker_pool_size, shutdown_worker_pool, io_accounting, format_io_report)
+    from utils import COLAB_ENV, display_menu, upload_pdfs, download_files, ask_drive_subfolder
+    sys.exit(cli())
@@ -0,0 +1,53 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'web_converter'))
+
+import conversor
+
+
+@pytest.fixture
+def base_dir(tmp_path, monkeypatch):
+    """Point the converter's base folder, cache and page checkpoints at a temporary directory."""
+    monkeypatch.setattr(conversor, 'GLOBAL_BASE_DRIVE_PATH', str(tmp_path))
+    monkeypatch.setattr(conversor, 'CACHE_ENABLED', True)
+    monkeypatch.setattr(conversor, 'CACHE_DIR', None)
+    monkeypatch.setattr(conversor, 'PAGE_STORE_PATH', None)
+    return tmp_path
+
+
+@pytest.fixture
+def sample_pdf(base_dir):
+    """A small file standing in for an input PDF (only its bytes are hashed)."""
+    path = base_dir / 'documento.pdf'
+    path.write_bytes(b'%PDF-1.4 conteudo de exemplo')
+    return str(path)
+
+
+@pytest.fixture
+def text_pdf(base_dir):
+    """A 3-page PDF generated with PyMuPDF: a line of text on every page and a small image on the first."""
+    import fitz
+    path = base_dir / 'relatorio.pdf'
+    with fitz.open() as doc:
+        for page_num in range(1, 4):
+            page = doc.new_page()
+            page.insert_text((72, 72), f"Pagina {page_num} do relatorio", fontsize=14)
+        pixmap = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 64, 64), False)
+        pixmap.set_rect(pixmap.irect, (200, 30, 30))
+        doc[0].insert_image(fitz.Rect(72, 100, 136, 164), pixmap=pixmap)
+        doc.save(str(path))
+    return str(path)
+
+
+@pytest.fixture
+def worker_pool(monkeypatch):
+    """A small shared pool started for this test only (workers take the test's settings)."""
+    conversor.shutdown_worker_pool()
+    monkeypatch.setattr(conversor, 'WORKER_POOL_SIZE', 2)
+    yield
+    conversor.shutdown_worker_pool()
@@ -0,0 +1,93 @@
+import os
+
+import conversor
+
+
+def make_conversion(calls, incomplete=False):
+    @conversor._cached_conversion
+    def convert(pdf_path, suffix='txt', output_dir=None):
+        calls.append(pdf_path)
+        output_path = os.path.join(conversor._output_dir(output_dir), f"saida.{suffix}")
+        with open(output_path, 'w') as f:
+            f.write(f"resultado {len(calls)}")
+        if incomplete:
+            conversor._mark_incomplete()
+        return output_path
+    return convert
+
+
+def test_cache_hit_skips_conversion_and_copies_to_output_folder(sample_pdf, base_dir):
+    calls = []
+    convert = make_conversion(calls)
+
+    first = convert(sample_pdf)
+    os.remove(first)
+    second = convert(sample_pdf)
+
+    assert len(calls) == 1
+    assert second == os.path.join(str(base_dir), 'output_files', 'saida.txt')
+    assert open(second).read() == 'resultado 1'
+
+
+def test_cache_key_includes_parameters_but_not_output_dir(sample_pdf, base_dir):
+    calls = []
+    convert = make_conversion(calls)
+
+    convert(sample_pdf)
+    convert(sample_pdf, suffix='md')
+    copied = convert(sample_pdf, output_dir=str(base_dir / 'outra'))
+
+    assert len(calls) == 2
+    assert copied == str(base_dir / 'outra' / 'saida.txt')
+    assert os.path.isfile(copied)
+
+
+def test_cache_disabled_always_converts(sample_pdf, monkeypatch):
+    monkeypatch.setattr(conversor, 'CACHE_ENABLED', False)
+    calls = []
+    convert = make_conversion(calls)
+
+    convert(sample_pdf)
+    convert(sample_pdf)
+
+    assert len(calls) == 2
+
+
+def test_incomplete_result_is_returned_but_not_cached(sample_pdf):
+    calls = []
+    convert = make_conversion(calls, incomplete=True)
+
+    assert convert(sample_pdf)
+    convert(sample_pdf)
+
+    assert len(calls) == 2
+
+
+def test_data_only_entries_keep_strings_that_look_like_paths(sample_pdf):
+    key = conversor._cache_key('extract_tables', [sample_pdf], {})
+    tables = [[1, 0, [[sample_pdf, 'b'], [None, '2']]]]
+
+    conversor._cache_store(key, tables, data_only=True)
+
+    assert conversor._cache_lookup(key) == tables
+
+
+
+def test_render_key_follows_profile_settings_and_engine(sample_pdf, monkeypatch):
+    calls = []
+
+    @conversor._cached_conversion(key_params=conversor._render_key)
+    def render(pdf_path, profile='default', output_dir=None):
+        calls.append(profile)
+        output_path = os.path.join(conversor._output_dir(output_dir), 'paginas.zip')
+        open(output_path, 'w').close()
+        return output_path
+
+    render(sample_pdf, profile='web')
+    render(sample_pdf, profile='web')
+    monkeypatch.setitem(conversor.RENDER_PROFILES, 'web', dict(conversor.RENDER_PROFILES['web'], dpi=72))
+    render(sample_pdf, profile='web')
+    monkeypatch.setattr(conversor, 'RASTER_ENGINE', 'poppler')
+    render(sample_pdf, profile='web')
+
+    assert len(calls) == 3
@@ -0,0 +1,79 @@
+import conversor
+
+
+def test_checkpoints_round_trip_and_discard(base_dir):
+    params = conversor._page_params(dpi=300, lang='por')
+    with conversor._page_store() as store:
+        conversor._save_page_checkpoint(store, 'hash', 'ocr', params, 2, b'pagina 2')
+        conversor._save_page_checkpoint(store, 'hash', 'ocr', params, 5, b'pagina 5')
+        conversor._save_page_checkpoint(store, 'hash', 'image', params, 1, b'outro tipo')
+
+    assert conversor._checkpointed_pages('hash', 'ocr', params) == {2, 5}
+    assert conversor._checkpointed_pages('hash', 'ocr', conversor._page_params(dpi=150, lang='por')) == set()
+    with conversor._page_store() as store:
+        assert conversor._load_page_checkpoint(store, 'hash', 'ocr', params, 5) == b'pagina 5'
+
+    conversor._discard_page_checkpoints('hash', 'ocr', params)
+    assert conversor._checkpointed_pages('hash', 'ocr', params) == set()
+    assert conversor._checkpointed_pages('hash', 'image', params) == {1}
+
+
+def test_checkpoints_are_discarded_with_cache_disabled(text_pdf, worker_pool, monkeypatch):
+    monkeypatch.setattr(conversor, 'CACHE_ENABLED', False)
+    saved = []
+    save = conversor._save_page_checkpoint
+    monkeypatch.setattr(conversor, '_save_page_checkpoint', lambda *args: saved.append(args[4]) or save(*args))
+
+    assert conversor.pdf_to_images(text_pdf, profile='thumbnail')
+
+    assert saved == [1, 2, 3]
+    with conversor._page_store() as store:
+        assert store.execute("SELECT COUNT(*) FROM pages").fetchone()[0] == 0
+
+
+def test_merge_checkpointed_interleaves_stored_and_fresh_pages_in_order():
+    done = {1, 4, 5}
+    fresh = iter([[(2, 'novo 2'), (3, 'novo 3')], [(6, 'novo 6')]])
+    loaded = []
+
+    def load(page_num):
+        loaded.append(page_num)
+        return f"salvo {page_num}"
+
+    merged = list(conversor._merge_checkpointed(6, done, fresh, load))
+
+    assert merged == [
+        (1, 'salvo 1', False), (2, 'novo 2', True), (3, 'novo 3', True),
+        (4, 'salvo 4', False), (5, 'salvo 5', False), (6, 'novo 6', True),
+    ]
+    assert loaded == [1, 4, 5]
+
+
+def test_merge_checkpointed_reads_stored_pages_lazily():
+    loaded = []
+    fresh = iter([[(2, 'novo 2')]])
+    merged = conversor._merge_checkpointed(3, {1, 3}, fresh, lambda page_num: loaded.append(page_num) or page_num)
+
+    assert loaded == []
+    next(merged)
+    assert loaded == [1]
+    list(merged)
+    assert loaded == [1, 3]
+
+
+def test_resume_runs_only_missing_pages(base_dir):
+    params = conversor._page_params(kind='teste')
+    with conversor._page_store() as store:
+        for page_num in (1, 3):
+            conversor._save_page_checkpoint(store, 'doc', 'ocr', params, page_num, f"salvo {page_num}".encode())
+
+    done = conversor._checkpointed_pages('doc', 'ocr', params)
+    pending = [page_num for page_num in range(1, 5) if page_num not in done]
+    fresh = ([(page_num, f"novo {page_num}") for page_num in range(first, last + 1)]
+             for first, last in conversor._chunk_pages(pending))
+    with conversor._page_store() as store:
+        load = lambda page_num: conversor._load_page_checkpoint(store, 'doc', 'ocr', params, page_num).decode()
+        results = [result for _, result, _ in conversor._merge_checkpointed(4, done, fresh, load)]
+
+    assert pending == [2, 4]
+    assert results == ['salvo 1', 'novo 2', 'salvo 3', 'novo 4']
@@ -0,0 +1,45 @@
+import os
+import zipfile
+
+import conversor
+
+
+def test_convert_all_reads_every_page_once_for_all_outputs(text_pdf, worker_pool, base_dir):
+    outputs = conversor.convert_all(text_pdf, outputs=('text', 'html', 'images', 'ocr'))
+
+    names = sorted(os.path.basename(path) for path in outputs)
+    assert names == ['relatorio.html', 'relatorio.txt', 'relatorio_images.zip', 'relatorio_ocr.pdf']
+    assert all(os.path.dirname(path) == str(base_dir / 'output_files') for path in outputs)
+    text = open(os.path.join(base_dir, 'output_files', 'relatorio.txt'), encoding='utf-8').read()
+    assert all(f"Pagina {page_num} do relatorio" in text for page_num in (1, 2, 3))
+    with zipfile.ZipFile(os.path.join(base_dir, 'output_files', 'relatorio_images.zip')) as zipf:
+        assert len(zipf.namelist()) == 3
+
+
+def test_convert_all_is_served_from_cache(text_pdf, worker_pool, base_dir, capsys):
+    first = conversor.convert_all(text_pdf, outputs=('text',))
+    capsys.readouterr()
+    second = conversor.convert_all(text_pdf, outputs=('text',), output_dir=str(base_dir / 'copia'))
+
+    assert 'reaproveitado do cache' in capsys.readouterr().out
+    assert [os.path.basename(path) for path in second] == [os.path.basename(path) for path in first]
+    assert os.path.isfile(second[0])
+
+
+def test_convert_all_with_failed_pages_is_not_cached(text_pdf, worker_pool, monkeypatch):
+    def fail_second_page(task):
+        results = analyze(task)
+        for result in results:
+            if result['page'] == 2:
+                result['error'] = 'falha simulada'
+        return results
+
+    analyze = conversor._analyze_page_range
+    monkeypatch.setattr(conversor, 'WORKER_POOL_SIZE', 1)
+    monkeypatch.setattr(conversor, '_IN_WORKER', True)  # roda as páginas neste processo
+    monkeypatch.setattr(conversor, '_analyze_page_range', fail_second_page)
+    key = conversor._cache_key('convert_all', [text_pdf], conversor._convert_all_key({'outputs': ('text',)}))
+
+    conversor.convert_all(text_pdf, outputs=('text',))
+
+    assert conversor._cache_lookup(key) is None
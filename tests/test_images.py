@@ -0,0 +1,26 @@
+import json
+import os
+import zipfile
+
+import conversor
+
+
+def test_pdf_to_images_and_extracted_images_use_separate_archives(text_pdf, worker_pool, base_dir):
+    rendered = conversor.pdf_to_images(text_pdf, profile='thumbnail')
+    extracted = conversor.extract_images_from_pdf(text_pdf)
+
+    assert rendered == str(base_dir / 'output_files' / 'relatorio_images.zip')
+    assert extracted == str(base_dir / 'output_files' / 'relatorio_extracted_images.zip')
+    with zipfile.ZipFile(rendered) as zipf:
+        assert len(zipf.namelist()) == 3
+    with zipfile.ZipFile(extracted) as zipf:
+        images = [name for name in zipf.namelist() if name != 'manifest.json']
+        manifest = json.loads(zipf.read('manifest.json'))
+    assert len(images) == 1
+    assert manifest['pages'] == {'1': images}
+
+
+def test_conversions_run_concurrently_on_the_shared_pool(text_pdf, worker_pool, base_dir):
+    outputs = conversor.run_conversions([text_pdf], ['text', 'images', 'extract_images'])
+
+    assert [os.path.basename(path) for path in outputs] == ['relatorio.txt', 'relatorio_images.zip', 'relatorio_extracted_images.zip']
@@ -0,0 +1,122 @@
+import os
+
+import pytest
+
+import conversor
+import jobs
+
+
+@pytest.fixture
+def jobs_dir(base_dir, monkeypatch):
+    monkeypatch.setattr(jobs, '_JOBS_DIR', str(base_dir / 'jobs'))
+    jobs._CANCELLED.clear()
+    return base_dir / 'jobs'
+
+
+def submit(conversions=('text',), options=None):
+    job_id = jobs.new_job_id()
+    input_path = os.path.join(jobs.job_input_dir(job_id), 'entrada.pdf')
+    with open(input_path, 'wb') as f:
+        f.write(b'%PDF-1.4')
+    return jobs.submit_job(job_id, [input_path], list(conversions), options)
+
+
+def test_submitted_job_is_queued_then_claimed(jobs_dir):
+    job_id = submit(options={'images': {'profile': 'web'}})
+
+    job = jobs.get_job(job_id)
+    assert job['status'] == 'queued'
+    assert job['options'] == {'images': {'profile': 'web'}}
+    assert jobs._claim_next_job() == job_id
+    assert jobs.get_job(job_id)['status'] == 'running'
+    assert jobs._claim_next_job() is None
+
+
+def test_jobs_are_claimed_oldest_first(jobs_dir):
+    first, second = submit(), submit()
+
+    assert [jobs._claim_next_job(), jobs._claim_next_job()] == [first, second]
+
+
+def test_cancel_queued_job_is_immediate(jobs_dir):
+    job_id = submit()
+
+    assert jobs.cancel_job(job_id) == 'cancelled'
+    assert jobs.get_job(job_id)['status'] == 'cancelled'
+    assert jobs._claim_next_job() is None
+    assert jobs.cancel_job('inexistente') is None
+
+
+def test_run_job_writes_result_and_cleans_up(jobs_dir, monkeypatch):
+    calls = {}
+
+    def fake_run_conversions(inputs, conversions, output_dir=None, options=None):
+        calls['output_dir'] = output_dir
+        path = os.path.join(output_dir, 'entrada.txt')
+        os.makedirs(output_dir, exist_ok=True)
+        with open(path, 'w') as f:
+            f.write('texto')
+        return [path]
+
+    monkeypatch.setattr(jobs, 'run_conversions', fake_run_conversions)
+    job_id = submit()
+    jobs._claim_next_job()
+    jobs._run_job(job_id)
+
+    job = jobs.get_job(job_id)
+    assert job['status'] == 'done'
+    assert os.path.isfile(job['result_path'])
+    assert calls['output_dir'] == os.path.join(str(jobs_dir), 'outputs', job_id)
+    assert not os.path.exists(calls['output_dir'])
+    assert not os.path.exists(os.path.join(str(jobs_dir), 'inputs', job_id))
+    assert job['io']['zip']['written'] > 0
+
+
+def test_run_job_without_outputs_fails(jobs_dir, monkeypatch):
+    monkeypatch.setattr(jobs, 'run_conversions', lambda *args, **kwargs: [])
+    job_id = submit()
+    jobs._claim_next_job()
+    jobs._run_job(job_id)
+
+    job = jobs.get_job(job_id)
+    assert job['status'] == 'failed'
+    assert job['error']
+
+
+def test_running_job_is_cancelled_at_next_progress_step(jobs_dir, monkeypatch):
+    def fake_run_conversions(inputs, conversions, output_dir=None, options=None):
+        assert jobs.cancel_job(job_id) == 'running'
+        conversor._report_progress('text', 1, 2)
+        pytest.fail("a conversão deveria ter sido interrompida")
+
+    monkeypatch.setattr(jobs, 'run_conversions', fake_run_conversions)
+    job_id = submit()
+    jobs._claim_next_job()
+    jobs._run_job(job_id)
+
+    assert jobs.get_job(job_id)['status'] == 'cancelled'
+    assert job_id not in jobs._CANCELLED
+
+
+def test_prune_removes_old_finished_jobs_and_results(jobs_dir):
+    old_done, old_queued, recent_done = submit(), submit(), submit()
+    results_dir = jobs_dir / 'results'
+    results_dir.mkdir()
+    for job_id in (old_done, recent_done):
+        result_path = results_dir / f"{job_id}.zip"
+        result_path.write_bytes(b'zip')
+        jobs._update_job(job_id, status='done', result_path=str(result_path))
+    orphan = results_dir / 'orfao.zip'
+    orphan.write_bytes(b'zip')
+    os.utime(orphan, (0, 0))
+    with jobs._jobs_db() as conn:
+        conn.execute("UPDATE jobs SET updated = 0 WHERE id IN (?, ?)", (old_done, old_queued))
+
+    assert jobs.prune_jobs(retention=3600) == 1
+
+    assert jobs.get_job(old_done) is None
+    assert not (results_dir / f"{old_done}.zip").exists()
+    assert jobs.get_job(old_queued)['status'] == 'queued'
+    assert jobs.get_job(recent_done)['status'] == 'done'
+    assert (results_dir / f"{recent_done}.zip").exists()
+    assert not orphan.exists()
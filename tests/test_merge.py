@@ -0,0 +1,34 @@
+import fitz
+
+import conversor
+
+
+def make_inputs(base_dir, count):
+    paths = []
+    for index in range(count):
+        path = base_dir / f"entrada_{index}.pdf"
+        with fitz.open() as doc:
+            for page in range(index % 2 + 1):
+                doc.new_page().insert_text((72, 72), f"Entrada {index} pagina {page + 1}")
+            doc.save(str(path))
+        paths.append(str(path))
+    return paths
+
+
+def test_merge_flushes_partial_result_and_keeps_input_order(base_dir):
+    paths = make_inputs(base_dir, 7)
+
+    merged = conversor.merge_pdfs(paths, output_name='juntos', flush_every=2)
+
+    assert merged == str(base_dir / 'output_files' / 'juntos.pdf')
+    with fitz.open(merged) as doc:
+        texts = [page.get_text().strip() for page in doc]
+    assert texts == [f"Entrada {index} pagina {page + 1}" for index in range(7) for page in range(index % 2 + 1)]
+    assert sorted(p.name for p in (base_dir / 'output_files').iterdir()) == ['juntos.pdf']
+
+
+def test_merge_reports_unreadable_input(base_dir):
+    paths = make_inputs(base_dir, 2) + [str(base_dir / 'inexistente.pdf')]
+
+    assert conversor.merge_pdfs(paths, flush_every=1) is None
+    assert list((base_dir / 'output_files').iterdir()) == []
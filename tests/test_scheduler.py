@@ -0,0 +1,101 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+import conversor
+
+
+def test_task_graph_runs_dependencies_first():
+    order = []
+    lock = threading.Lock()
+
+    def task(name):
+        def call():
+            with lock:
+                order.append(name)
+            return name
+        return call
+
+    tasks = {
+        'tables': (task('tables'), ()),
+        'excel': (task('excel'), ('tables',)),
+        'csv': (task('csv'), ('tables',)),
+        'text': (task('text'), ()),
+    }
+    results = conversor._run_task_graph(tasks, max_parallel=2)
+
+    assert results == {name: name for name in tasks}
+    assert order.index('tables') < order.index('excel')
+    assert order.index('tables') < order.index('csv')
+
+
+def test_task_graph_skips_dependents_of_failed_tasks():
+    ran = []
+
+    def failing():
+        raise RuntimeError("falhou")
+
+    tasks = {
+        'tables': (failing, ()),
+        'excel': (lambda: ran.append('excel') or 'excel', ('tables',)),
+        'empty': (lambda: None, ()),
+        'after_empty': (lambda: ran.append('after_empty') or 'x', ('empty',)),
+        'text': (lambda: 'texto', ()),
+    }
+    results = conversor._run_task_graph(tasks, max_parallel=2)
+
+    assert results == {'tables': None, 'excel': None, 'empty': None, 'after_empty': None, 'text': 'texto'}
+    assert ran == []
+
+
+def test_task_graph_rejects_circular_dependencies():
+    tasks = {'a': (lambda: 'a', ('b',)), 'b': (lambda: 'b', ('a',))}
+
+    with pytest.raises(ValueError):
+        conversor._run_task_graph(tasks, max_parallel=1)
+
+
+
+def _exit_worker():
+    os._exit(1)
+
+
+def test_broken_pool_is_replaced_for_the_next_conversion(worker_pool):
+    with pytest.raises(BrokenProcessPool):
+        conversor._run_conversion(_exit_worker, 'pool', (), {})
+
+    assert conversor._WORKER_POOL is None
+    assert conversor._run_conversion(len, 'pool', ([1, 2, 3],), {}) == 3
+
+
+def test_iter_ordered_keeps_order_and_bounds_submissions():
+    consumed = []
+
+    def items():
+        for item in range(50):
+            consumed.append(item)
+            yield item
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = conversor._iter_ordered(executor, lambda x: x * x, items(), window=3)
+        assert next(results) == 0
+        assert len(consumed) <= 4
+        assert list(results) == [x * x for x in range(1, 50)]
+
+
+def test_iter_ordered_cancels_pending_calls_when_closed():
+    started = []
+
+    def slow(item):
+        started.append(item)
+        return item
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        results = conversor._iter_ordered(executor, slow, range(100), window=4)
+        assert next(results) == 0
+        results.close()
+
+    assert len(started) <= 5
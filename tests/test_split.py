@@ -0,0 +1,43 @@
+import zipfile
+
+import pytest
+
+import conversor
+
+
+@pytest.mark.parametrize('ranges, expected', [
+    ('1-3,5,8-', [(1, 3), (5, 5), (8, 10)]),
+    (' -2 , 4 - 4 ', [(1, 2), (4, 4)]),
+    ('7', [(7, 7)]),
+    ('1-10', [(1, 10)]),
+])
+def test_parse_page_ranges(ranges, expected):
+    assert conversor._parse_page_ranges(ranges, 10) == expected
+
+
+@pytest.mark.parametrize('ranges', ['', ',', '3-1', '0', '11', '2-12', 'a-b', '1;2'])
+def test_parse_page_ranges_rejects_invalid_input(ranges):
+    with pytest.raises(ValueError):
+        conversor._parse_page_ranges(ranges, 10)
+
+
+def test_chunk_pages_splits_runs_of_consecutive_pages():
+    assert conversor._chunk_pages([1, 2, 3, 4, 5, 7, 8, 10], chunk_size=2) == [(1, 2), (3, 4), (5, 5), (7, 8), (10, 10)]
+
+
+@pytest.mark.parametrize('options, expected', [
+    ({}, {'pagina_1.pdf': 1, 'pagina_2.pdf': 1, 'pagina_3.pdf': 1}),
+    ({'mode': 'ranges', 'ranges': '1-2,3'}, {'parte_1_paginas_1-2.pdf': 2, 'parte_2_paginas_3-3.pdf': 1}),
+    ({'mode': 'every', 'every': 2}, {'parte_1_paginas_1-2.pdf': 2, 'parte_2_paginas_3-3.pdf': 1}),
+])
+def test_split_pdf_writes_the_planned_parts(text_pdf, worker_pool, options, expected):
+    import fitz
+
+    zip_path = conversor.split_pdf(text_pdf, **options)
+
+    page_counts = {}
+    with zipfile.ZipFile(zip_path) as zipf:
+        for name in zipf.namelist():
+            with fitz.open(stream=zipf.read(name), filetype='pdf') as part:
+                page_counts[name] = part.page_count
+    assert page_counts == expected
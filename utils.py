@@ -1,19 +1,156 @@
 import os
 import io
-import zipfile
 import shutil
-from IPython.display import display, HTML
+import hashlib
+import tempfile
+import importlib.util
 import warnings
 warnings.filterwarnings('ignore')
 
-# Colab-specific imports for interactive file operations
+# Colab-specific modules (google.colab.files, IPython.display) are imported only where used;
+# here we just detect the environment without loading them
 try:
-    from google.colab import files
-    from google.colab import drive
-    COLAB_ENV = True
+    COLAB_ENV = importlib.util.find_spec('google.colab') is not None
 except ImportError:
     COLAB_ENV = False
 
+def _conversor(name):
+    """A function of conversor.py.
+
+    In the notebook both files are exec()'d into one namespace: use that copy, since importing the
+    module would load a second one with its own state (I/O report, hash registry). Elsewhere
+    (web app, CLI) conversor is a regular module.
+    """
+    if name in globals():
+        return globals()[name]
+    import conversor
+    return getattr(conversor, name)
+
+# ==================== UPLOADS ====================
+# Os uploads são gravados em disco em blocos, calculando o hash do conteúdo no caminho; nenhum
+# arquivo enviado fica inteiro na memória e os conversores recebem sempre o caminho gravado.
+UPLOAD_MAX_BYTES = 512 * 1024 * 1024   # Tamanho máximo de um PDF enviado
+UPLOAD_MAX_PAGES = 5000                # Número máximo de páginas de um PDF enviado
+UPLOAD_MAX_FILES = 20                  # Número máximo de PDFs em um mesmo envio (API de jobs)
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+class UploadRejected(ValueError):
+    """Upload recusado (arquivo grande demais, páginas demais ou não é um PDF)."""
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+def set_upload_limits(max_bytes=None, max_pages=None, max_files=None):
+    global UPLOAD_MAX_BYTES, UPLOAD_MAX_PAGES, UPLOAD_MAX_FILES
+    if max_bytes is not None:
+        UPLOAD_MAX_BYTES = max_bytes
+    if max_pages is not None:
+        UPLOAD_MAX_PAGES = max_pages
+    if max_files is not None:
+        UPLOAD_MAX_FILES = max_files
+
+class UploadWriter:
+    """
+    Recebe um upload em blocos (write) direto em um temporário na pasta de destino, calculando o
+    SHA-256 e recusando o envio assim que passa de max_bytes (padrão UPLOAD_MAX_BYTES). finish()
+    confere o cabeçalho e o número de páginas e move o arquivo para o caminho final, sem cópia.
+    Serve de destino para o parser de formulários da aplicação web e para save_upload_stream.
+    """
+    def __init__(self, temp_dir, max_bytes=None):
+        self.max_bytes = max_bytes or UPLOAD_MAX_BYTES
+        os.makedirs(temp_dir, exist_ok=True)
+        fd, self.temp_path = tempfile.mkstemp(suffix='.part', dir=temp_dir)
+        self.file = os.fdopen(fd, 'w+b')
+        self.sha = hashlib.sha256()
+        self.size = 0
+        self.head = b''
+        self.rejected = None
+
+    def write(self, data):
+        if len(self.head) < 1024:
+            self.head += bytes(data[:1024 - len(self.head)])
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            self.discard()
+            self.rejected = UploadRejected(f"Arquivo maior que o limite de {self.max_bytes // (1024 * 1024)} MB", status_code=413)
+            raise self.rejected
+        self.sha.update(data)
+        self.file.write(data)
+        return len(data)
+
+    # O parser de formulários reposiciona o arquivo depois de gravá-lo
+    def seek(self, *args):
+        return self.file.seek(*args)
+
+    def tell(self):
+        return self.file.tell()
+
+    def read(self, *args):
+        return self.file.read(*args)
+
+    def finish(self, dest_path, max_pages=None):
+        """Valida o arquivo recebido e o move para dest_path. Retorna (dest_path, sha256)."""
+        max_pages = max_pages or UPLOAD_MAX_PAGES
+        try:
+            self.file.close()
+            if self.size == 0:
+                raise UploadRejected("O arquivo enviado está vazio")
+            if b'%PDF-' not in self.head:
+                raise UploadRejected("O arquivo enviado não é um PDF")
+
+            import fitz  # PyMuPDF: só lê a tabela de referências, sem carregar as páginas
+            try:
+                with fitz.open(self.temp_path, filetype='pdf') as doc:
+                    page_count = doc.page_count
+            except Exception as e:
+                raise UploadRejected(f"PDF inválido: {e}")
+            if page_count > max_pages:
+                raise UploadRejected(f"PDF com {page_count} páginas excede o limite de {max_pages}", status_code=413)
+
+            os.makedirs(os.path.dirname(os.path.abspath(dest_path)), exist_ok=True)
+            os.replace(self.temp_path, dest_path)
+        except BaseException:
+            self.discard()
+            raise
+        digest = self.sha.hexdigest()
+        _conversor('register_file_sha256')(dest_path, digest)
+        _conversor('record_io')('upload', written=self.size)
+        return dest_path, digest
+
+    def discard(self):
+        """Descarta o upload (recusado ou não usado)."""
+        self.file.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+def save_upload_stream(stream, dest_path, max_bytes=None, max_pages=None):
+    """
+    Grava um upload em disco em blocos, a partir de um objeto com read(), calculando o SHA-256.
+    O arquivo é escrito em um temporário ao lado do destino e só é movido para dest_path depois de
+    passar pelas verificações: o envio é interrompido assim que passa de max_bytes (padrão
+    UPLOAD_MAX_BYTES), o cabeçalho precisa ser de um PDF e o número de páginas não pode passar de
+    max_pages (padrão UPLOAD_MAX_PAGES). Se stream já for um UploadWriter (upload recebido pela
+    aplicação web), ele só é validado e movido. O hash fica registrado no cache do conversor, que
+    não precisa reler o arquivo. Retorna (dest_path, sha256); levanta UploadRejected se recusado.
+    """
+    if isinstance(stream, UploadWriter):
+        return stream.finish(dest_path, max_pages)
+
+    writer = UploadWriter(os.path.dirname(os.path.abspath(dest_path)), max_bytes)
+    try:
+        for chunk in iter(lambda: stream.read(UPLOAD_CHUNK_SIZE), b''):
+            writer.write(chunk)
+    except BaseException:
+        writer.discard()
+        raise
+    return writer.finish(dest_path, max_pages)
+
+def create_directories():
+    """Cria as pastas de entrada e saída dentro do diretório base"""
+    base_path = _conversor('get_base_drive_path')()
+    for folder in ("input_files", "output_files"):
+        os.makedirs(os.path.join(base_path, folder), exist_ok=True)
+
 def show_welcome():
     """Exibe mensagem de boas-vindas"""
     welcome_html = """
@@ -28,6 +165,7 @@ def show_welcome():
     </div>
     """
     if COLAB_ENV:
+        from IPython.display import display, HTML
         display(HTML(welcome_html))
     else:
         print("=========================================")
@@ -57,6 +195,7 @@ def display_menu():
     11. Dividir PDF por páginas
     12. Comprimir PDF
     13. Converter todas as opções
+    14. PDF para Parquet (tabelas)
 
     0. Sair
 
@@ -64,12 +203,27 @@ def display_menu():
     """
     print(menu)
 
+def link_input(src_path, input_dir):
+    """
+    Disponibiliza um PDF em input_dir sem copiar seu conteúdo: cria um hard link quando origem e
+    destino estão no mesmo sistema de arquivos; caso contrário (Drive montado, destino já existente)
+    retorna o próprio caminho de origem, lido no lugar pelos conversores.
+    """
+    dest_path = os.path.join(input_dir, os.path.basename(src_path))
+    if os.path.abspath(src_path) == os.path.abspath(dest_path):
+        return dest_path
+    try:
+        os.link(src_path, dest_path)
+        return dest_path
+    except OSError:
+        return src_path
+
 def upload_pdfs(input_dir, from_drive=False):
     """
     Upload de múltiplos arquivos PDF.
-    Se from_drive=True, o usuário insere caminhos do Google Drive.
-    Caso contrário, usa o uploader interativo do Colab.
-    Todos os PDFs são copiados para input_dir.
+    Se from_drive=True, o usuário insere caminhos do Google Drive, e os PDFs são lidos no lugar
+    (ou vinculados a input_dir com hard link), sem cópia pela rede.
+    Caso contrário, usa o uploader interativo do Colab e grava os PDFs em input_dir.
     """
     processed_pdf_files = []
     os.makedirs(input_dir, exist_ok=True) # Ensure input directory exists
@@ -92,49 +246,56 @@ def upload_pdfs(input_dir, from_drive=False):
                     for filename in filenames:
                         if filename.lower().endswith('.pdf'):
                             src_path = os.path.join(root, filename)
-                            dest_path = os.path.join(input_dir, filename)
-                            try:
-                                # Use shutil.copy2 to preserve metadata
-                                shutil.copy2(src_path, dest_path)
-                                processed_pdf_files.append(dest_path)
-                                print(f"✅ PDF copiado do Drive: {filename}")
-                            except Exception as e:
-                                print(f"❌ Erro ao copiar PDF '{filename}' do Drive: {e}")
+                            processed_pdf_files.append(link_input(src_path, input_dir))
+                            print(f"✅ PDF do Drive: {filename}")
             elif os.path.exists(full_drive_path) and full_drive_path.lower().endswith('.pdf'):
                 filename = os.path.basename(full_drive_path)
-                dest_path = os.path.join(input_dir, filename)
-                try:
-                    shutil.copy2(full_drive_path, dest_path)
-                    processed_pdf_files.append(dest_path)
-                    print(f"✅ PDF copiado do Drive: {filename}")
-                except Exception as e:
-                    print(f"❌ Erro ao copiar PDF '{filename}' do Drive: {e}")
+                processed_pdf_files.append(link_input(full_drive_path, input_dir))
+                print(f"✅ PDF do Drive: {filename}")
             else:
                 print(f"⚠️ Caminho ignorado (não é um PDF válido ou diretório existente): {path}")
 
     elif COLAB_ENV:
+        from google.colab import files
+
         print("\n📤 Selecione seus arquivos PDF para upload...")
         uploaded = files.upload()
 
-        for filename, content in uploaded.items():
+        for filename in list(uploaded):
+            # Cada conteúdo é liberado logo depois de gravado, para não manter todos os uploads na memória
+            content = uploaded.pop(filename)
             if filename.lower().endswith('.pdf'):
                 filepath = os.path.join(input_dir, filename)
-                with open(filepath, "wb") as f:
-                    f.write(content)
-                processed_pdf_files.append(filepath)
-                print(f"✅ PDF carregado: {filename}")
+                try:
+                    save_upload_stream(io.BytesIO(content), filepath)
+                    processed_pdf_files.append(filepath)
+                    print(f"✅ PDF carregado: {filename}")
+                except UploadRejected as e:
+                    print(f"❌ PDF recusado '{filename}': {e}")
             else:
                 print(f"⚠️ Arquivo ignorado (não é PDF): {filename}")
+            del content
     else:
         print("⚠️ Ambiente Colab não detectado ou from_drive=False. Não é possível fazer upload interativo.")
         return []
 
     return processed_pdf_files
 
-def download_files(file_paths, output_dir, to_drive=False):
+def ask_drive_subfolder(output_dir):
+    """Pergunta o nome da subpasta do Drive onde salvar os resultados e retorna o caminho (criado)"""
+    subfolder_name = input("📁 Digite o nome da subpasta no Google Drive para salvar (padrão: Converted_Files): ").strip()
+    if not subfolder_name:
+        subfolder_name = "Converted_Files"
+    drive_save_path = os.path.join(output_dir, subfolder_name)
+    os.makedirs(drive_save_path, exist_ok=True)
+    return drive_save_path
+
+def download_files(file_paths, output_dir, to_drive=False, drive_save_path=None):
     """
     Gerencia o download ou salvamento dos arquivos convertidos.
-    Se to_drive=True, os arquivos são salvos diretamente em uma subpasta dentro de output_dir no Google Drive.
+    Se to_drive=True, os arquivos são salvos em uma subpasta dentro de output_dir no Google Drive
+    (drive_save_path, ou perguntada ao usuário). Arquivos que as conversões já gravaram nessa
+    subpasta (run_conversions com output_dir) não são copiados de novo.
     Caso contrário, um arquivo ZIP é criado em output_dir e oferecido para download local.
     """
     if not file_paths:
@@ -144,20 +305,22 @@ def download_files(file_paths, output_dir, to_drive=False):
     os.makedirs(output_dir, exist_ok=True) # Ensure output directory exists
 
     if to_drive and COLAB_ENV:
-        print("\n📥 Salvando arquivos no Google Drive...")
-        subfolder_name = input("📁 Digite o nome da subpasta no Google Drive para salvar (padrão: Converted_Files): ").strip()
-        if not subfolder_name:
-            subfolder_name = "Converted_Files"
+        record_io = _conversor('record_io')
 
-        drive_save_path = os.path.join(output_dir, subfolder_name)
-        os.makedirs(drive_save_path, exist_ok=True)
+        print("\n📥 Salvando arquivos no Google Drive...")
+        drive_save_path = drive_save_path or ask_drive_subfolder(output_dir)
 
         saved_count = 0
         for file_path in file_paths:
             if os.path.exists(file_path):
                 dest_path = os.path.join(drive_save_path, os.path.basename(file_path))
+                if os.path.exists(dest_path) and os.path.samefile(file_path, dest_path):
+                    print(f"✅ Já está no Drive: {os.path.basename(file_path)} -> {drive_save_path}")
+                    saved_count += 1
+                    continue
                 try:
                     shutil.copy2(file_path, dest_path)
+                    record_io('download', read=os.path.getsize(file_path), written=os.path.getsize(dest_path))
                     print(f"✅ Salvo no Drive: {os.path.basename(file_path)} -> {drive_save_path}")
                     saved_count += 1
                 except Exception as e:
@@ -166,15 +329,11 @@ def download_files(file_paths, output_dir, to_drive=False):
                 print(f"⚠️ Arquivo não encontrado para salvar: {file_path}")
         print(f"🎉 Total de {saved_count} arquivo(s) salvo(s) no Google Drive.")
     elif COLAB_ENV:
+        from google.colab import files
+        write_archive = _conversor('write_archive') # Compressão escolhida por tipo de arquivo
+
         zip_filename = "converted_files.zip"
-        zip_filepath = os.path.join(output_dir, zip_filename)
-
-        with zipfile.ZipFile(zip_filepath, 'w') as zipf:
-            for file in file_paths:
-                if os.path.exists(file):
-                    zipf.write(file, os.path.basename(file))
-                else:
-                    print(f"⚠️ Arquivo não encontrado para adicionar ao ZIP: {file}")
+        zip_filepath = write_archive(file_paths, os.path.join(output_dir, zip_filename))
 
         print(f"📥 Arquivo ZIP pronto para download local: {zip_filepath}")
         files.download(zip_filepath)
@@ -1,60 +1,111 @@
 import os
+import uuid
 import shutil
 import warnings
 import logging
 
-from flask import Flask, request, render_template, send_file, jsonify
+from flask import Flask, Request, Response, request, render_template, jsonify, stream_with_context, send_file, url_for
 from flask_ngrok import run_with_ngrok # Importado para expor a app no Colab
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 # Import functions from utils and conversor
-from utils import create_directories, upload_pdfs, download_files
-from conversor import (
-    pdf_to_text,
-    pdf_to_word,
-    pdf_to_excel,
-    pdf_to_images,
-    pdf_to_html,
-    pdf_to_pdfa,
-    pdf_ocr,
-    extract_images_from_pdf,
-    merge_pdfs,
-    split_pdf,
-    compress_pdf,
-    pdf_to_csv_conversion
-)
+import utils
+from utils import create_directories, save_upload_stream, UploadRejected, UploadWriter
+from conversor import CONVERSION_MENU_OPTIONS, RENDER_PROFILES, run_conversions, iter_archive, get_base_drive_path
+from jobs import new_job_id, job_input_dir, get_jobs_dir, submit_job, get_job, cancel_job, start_dispatcher
 
 # Ignorar warnings
 warnings.filterwarnings('ignore')
 
+UPLOAD_FORM_OVERHEAD = 1024 * 1024  # Margem para os campos do formulário e os cabeçalhos multipart
+
+class UploadRequest(Request):
+    """Request that writes uploaded files straight to their destination folder.
+
+    Each file part goes into a utils.UploadWriter (size limit, hash and single write as it
+    arrives) instead of Werkzeug's spooled temporary file; save_upload_stream then only validates
+    and moves it. The request size limit follows the current upload limits of the endpoint.
+    """
+    @property
+    def max_content_length(self):
+        files = utils.UPLOAD_MAX_FILES if self.endpoint == 'create_job' else 1
+        return utils.UPLOAD_MAX_BYTES * files + UPLOAD_FORM_OVERHEAD
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.endpoint == 'create_job':
+            temp_dir = os.path.join(get_jobs_dir(), "inputs")
+        else:
+            temp_dir = os.path.join(get_base_drive_path(), "input_files")
+        writer = UploadWriter(temp_dir)
+        self.__dict__.setdefault('upload_writers', []).append(writer)
+        return writer
+
+    def _load_form_data(self):
+        super()._load_form_data()
+        # Werkzeug's parser swallows ValueError (UploadRejected included) and returns an empty form
+        for writer in self.__dict__.get('upload_writers', []):
+            if writer.rejected is not None:
+                raise writer.rejected
+
 app = Flask(__name__, template_folder='templates', static_folder='static')
+app.request_class = UploadRequest
 run_with_ngrok(app) # Habilita o ngrok para a aplicação Flask
 
 # Ensure directories exist when the app starts
 create_directories()
 
-# Mapping conversion choice to function
-CONVERSION_FUNCTIONS = {
-    '1': pdf_to_text,
-    '2': pdf_to_word,
-    '3': pdf_to_excel,
-    '4': pdf_to_images,
-    '5': pdf_to_html,
-    '6': pdf_to_pdfa,
-    '7': pdf_ocr,
-    '8': extract_images_from_pdf,
-    '9': pdf_to_csv_conversion,
-    '11': split_pdf,
-    '12': compress_pdf,
-}
+@app.before_request
+def ensure_dispatcher():
+    # Started by the process that serves requests, never at import: the debug reloader's watcher
+    # process and pool workers that re-import this module must not run a second dispatcher.
+    # Interrupted jobs are requeued when it starts.
+    start_dispatcher()
+
+@app.errorhandler(413)
+def request_too_large(error):
+    logging.error("Upload rejected: request body exceeds the upload limit")
+    return jsonify({'error': f"Upload larger than {request.max_content_length // (1024 * 1024)} MB"}), 413
+
+@app.errorhandler(UploadRejected)
+def upload_rejected(error):
+    # Raised while the form is parsed, as soon as a file goes over UPLOAD_MAX_BYTES
+    logging.error(f"Upload rejected: {error}")
+    return jsonify({'error': str(error)}), error.status_code
+
+@app.teardown_request
+def discard_unused_uploads(error=None):
+    """Remove uploaded files the view did not keep (rejected requests, empty file fields)."""
+    for writer in request.__dict__.get('upload_writers', []):
+        writer.discard()
 
 @app.route('/')
 def index():
     logging.info("Serving index.html")
     return render_template('index.html')
 
+def _conversion_options():
+    """Per-conversion kwargs from the form (render_profile -> images). Returns (options, error)."""
+    profile = request.form.get('render_profile', '').strip()
+    if not profile:
+        return {}, None
+    if profile not in RENDER_PROFILES:
+        return None, f"Invalid render profile: {profile} (options: {', '.join(RENDER_PROFILES)})"
+    return {'images': {'profile': profile}}, None
+
+def _clean_up_request(*folders):
+    for folder in folders:
+        shutil.rmtree(folder, ignore_errors=True)
+    logging.info(f"Cleaned up request folders: {', '.join(folders)}")
+
+def _stream_and_clean_up(file_paths, *folders):
+    """Stream the ZIP of file_paths, then remove the request's folders (also if the client disconnects)."""
+    try:
+        yield from iter_archive(file_paths)
+    finally:
+        _clean_up_request(*folders)
+
 @app.route('/upload_and_convert', methods=['POST'])
 def upload_and_convert():
     logging.info("Received upload and convert request")
@@ -73,49 +124,47 @@ def upload_and_convert():
         logging.error("No conversion choice provided")
         return jsonify({'error': 'No conversion choice provided'}), 400
 
+    options, error = _conversion_options()
+    if error:
+        logging.error(error)
+        return jsonify({'error': error}), 400
+
     if pdf_file and pdf_file.filename.lower().endswith('.pdf'):
+        # Each request converts in its own folders: concurrent uploads of files with the same name
+        # neither overwrite each other's input nor mix their outputs
+        request_id = uuid.uuid4().hex
+        input_dir = os.path.join(get_base_drive_path(), "input_files", request_id)
+        output_dir = os.path.join(get_base_drive_path(), "output_files", request_id)
+        streaming = False
         try:
-            uploaded_files = upload_pdfs([pdf_file])
-            if not uploaded_files:
-                logging.error("Failed to upload PDF")
-                return jsonify({'error': 'Failed to upload PDF'}), 500
-            
-            input_pdf_path = uploaded_files[0]
+            try:
+                input_pdf_path, _ = save_upload_stream(pdf_file.stream, os.path.join(input_dir, os.path.basename(pdf_file.filename)))
+            except UploadRejected as e:
+                logging.error(f"Upload rejected: {e}")
+                return jsonify({'error': str(e)}), e.status_code
+
             converted_files = []
 
             if conversion_choice == '10': 
                 logging.warning("Merge PDF option selected but only one file uploaded. Skipping merge for now.")
                 return jsonify({'error': 'Merging PDFs requires multiple files, single file upload endpoint used.'}), 400
-            elif conversion_choice == '13': 
-                logging.info(f"Converting {input_pdf_path} to all formats")
-                conversions = [
-                    pdf_to_text, pdf_to_word, pdf_to_excel, pdf_to_images, 
-                    pdf_to_html, pdf_to_pdfa, pdf_ocr, pdf_to_csv_conversion
-                ]
-                for func in conversions:
-                    result = func(input_pdf_path)
-                    if result:
-                        if isinstance(result, list): 
-                            converted_files.extend(result)
-                        else:
-                            converted_files.append(result)
-            elif conversion_choice in CONVERSION_FUNCTIONS:
+            elif conversion_choice in CONVERSION_MENU_OPTIONS:
                 logging.info(f"Converting {input_pdf_path} using option {conversion_choice}")
-                func = CONVERSION_FUNCTIONS[conversion_choice]
-                result = func(input_pdf_path)
-                if result:
-                    if isinstance(result, list):
-                        converted_files.extend(result)
-                    else:
-                        converted_files.append(result)
+                # Option 13 is split by the scheduler into page pipeline, Word and PDF/A running concurrently
+                converted_files.extend(run_conversions([input_pdf_path], [conversion_choice], output_dir=output_dir, options=options))
             else:
                 logging.error(f"Invalid conversion choice: {conversion_choice}")
                 return jsonify({'error': 'Invalid conversion choice'}), 400
 
             if converted_files:
-                zip_file_path = download_files(converted_files)
-                logging.info(f"Conversion successful, sending {zip_file_path} for download")
-                return send_file(zip_file_path, as_attachment=True, download_name='converted_files.zip')
+                # The zip is built while it is being sent: no temporary archive on disk
+                logging.info(f"Conversion successful, streaming {len(converted_files)} file(s) as converted_files.zip")
+                streaming = True
+                return Response(
+                    stream_with_context(_stream_and_clean_up(converted_files, input_dir, output_dir)),
+                    mimetype='application/zip',
+                    headers={'Content-Disposition': 'attachment; filename=converted_files.zip'},
+                )
             else:
                 logging.warning("No files converted successfully.")
                 return jsonify({'error': 'No files converted successfully.'}), 500
@@ -124,11 +173,112 @@ def upload_and_convert():
             logging.exception(f"Error during conversion: {e}")
             return jsonify({'error': str(e)}), 500
         finally:
-            if 'input_pdf_path' in locals() and os.path.exists(input_pdf_path):
-                os.remove(input_pdf_path)
-                logging.info(f"Cleaned up input file: {input_pdf_path}")
+            if not streaming:
+                _clean_up_request(input_dir, output_dir)
 
     return jsonify({'error': 'Only PDF files are accepted.'}), 400
 
+def _job_response(job):
+    """Public view of a job: no server-side paths."""
+    response = {
+        'job_id': job['id'],
+        'status': job['status'],
+        'conversions': job['conversions'],
+        'options': job['options'],
+        'progress': job['progress'],
+        'io': job['io'],
+        'error': job['error'],
+        'created': job['created'],
+        'updated': job['updated'],
+        'status_url': url_for('job_status', job_id=job['id']),
+    }
+    if job['status'] == 'done':
+        response['download_url'] = url_for('job_download', job_id=job['id'])
+    return response
+
+@app.route('/jobs', methods=['POST'])
+def create_job():
+    """Submit a conversion job; returns immediately with the job id (202)."""
+    logging.info("Received job submission")
+    pdf_files = [f for f in request.files.getlist('pdf_file') if f.filename]
+    conversion_choice = request.form.get('conversion_choice', '')
+    conversions = [choice.strip() for choice in conversion_choice.split(',') if choice.strip()]
+
+    if not pdf_files:
+        return jsonify({'error': 'No selected file'}), 400
+    if len(pdf_files) > utils.UPLOAD_MAX_FILES:
+        return jsonify({'error': f"Too many files: at most {utils.UPLOAD_MAX_FILES} per job"}), 413
+    if not conversions:
+        return jsonify({'error': 'No conversion choice provided'}), 400
+    valid_names = set(CONVERSION_MENU_OPTIONS.values())
+    invalid = [choice for choice in conversions if choice not in CONVERSION_MENU_OPTIONS and choice not in valid_names]
+    if invalid:
+        return jsonify({'error': f"Invalid conversion choice: {', '.join(invalid)}"}), 400
+    if any(not f.filename.lower().endswith('.pdf') for f in pdf_files):
+        return jsonify({'error': 'Only PDF files are accepted.'}), 400
+    if any(CONVERSION_MENU_OPTIONS.get(choice, choice) == 'merge' for choice in conversions) and len(pdf_files) < 2:
+        return jsonify({'error': 'Merging PDFs requires at least two files.'}), 400
+    options, error = _conversion_options()
+    if error:
+        return jsonify({'error': error}), 400
+
+    job_id = new_job_id()
+    input_dir = job_input_dir(job_id)
+    input_paths = []
+    try:
+        for pdf_file, file_name in zip(pdf_files, _unique_file_names(pdf_files)):
+            input_path = os.path.join(input_dir, file_name)
+            input_paths.append(save_upload_stream(pdf_file.stream, input_path)[0])
+    except UploadRejected as e:
+        logging.error(f"Upload rejected for job {job_id}: {e}")
+        shutil.rmtree(input_dir, ignore_errors=True)
+        return jsonify({'error': f"{pdf_file.filename}: {e}"}), e.status_code
+
+    submit_job(job_id, input_paths, conversions, options)
+    logging.info(f"Queued job {job_id}: {len(input_paths)} file(s), conversions {conversions}")
+    return jsonify(_job_response(get_job(job_id))), 202
+
+def _unique_file_names(uploads):
+    """Original names of the uploaded files, with ' (2)', ' (3)'... added only to repeated names.
+
+    The outputs of a job share one folder and are named after their input, and the cache keys
+    include the input name, so names are kept unchanged unless two uploads would collide.
+    """
+    names, seen = [], set()
+    for upload in uploads:
+        name = os.path.basename(upload.filename)
+        stem, extension = os.path.splitext(name)
+        copy = 1
+        while name.lower() in seen:
+            copy += 1
+            name = f"{stem} ({copy}){extension}"
+        seen.add(name.lower())
+        names.append(name)
+    return names
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(_job_response(job))
+
+@app.route('/jobs/<job_id>/download', methods=['GET'])
+def job_download(job_id):
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if job['status'] != 'done' or not job['result_path'] or not os.path.exists(job['result_path']):
+        return jsonify({'error': f"Job is not ready (status: {job['status']})"}), 409
+    return send_file(job['result_path'], mimetype='application/zip', as_attachment=True, download_name='converted_files.zip')
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def job_cancel(job_id):
+    status = cancel_job(job_id)
+    if status is None:
+        return jsonify({'error': 'Job not found'}), 404
+    logging.info(f"Cancel requested for job {job_id} (status: {status})")
+    return jsonify({'job_id': job_id, 'status': status})
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,250 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+
+from conversor import get_base_drive_path, run_conversions, progress_callback, io_accounting, write_archive, ConversionCancelled
+
+# ==================== FILA DE JOBS ====================
+# Cada envio vira um job gravado em SQLite (jobs.sqlite na pasta de jobs), de modo que a fila
+# sobrevive a reinícios do servidor: jobs que estavam rodando voltam para a fila na partida.
+# Um despachante em segundo plano inicia no máximo JOB_CONCURRENCY jobs ao mesmo tempo, cada um
+# em sua própria thread; as conversões em si rodam no pool de workers compartilhado do conversor.
+# Cada job converte para sua própria pasta (outputs/<id>), apagada quando o ZIP do resultado
+# (results/<id>.zip) estiver gravado. Jobs encerrados há mais de JOB_RETENTION segundos são
+# removidos do banco junto com o ZIP do resultado.
+JOB_CONCURRENCY = int(os.environ.get('JOB_CONCURRENCY', 2))
+JOB_RETENTION = float(os.environ.get('JOB_RETENTION', 24 * 3600))
+JOB_POLL_INTERVAL = 1.0        # Segundos entre verificações da fila quando não há aviso de novo job
+JOB_PROGRESS_INTERVAL = 0.5    # Intervalo mínimo entre gravações de progresso de um mesmo job
+JOB_PRUNE_INTERVAL = 600.0     # Segundos entre limpezas dos jobs encerrados
+JOB_STATUSES = ('queued', 'running', 'done', 'failed', 'cancelled')
+
+_JOBS_DIR = None
+_JOBS_DB_LOCK = threading.Lock()
+_CANCELLED = set()
+_WAKE = threading.Event()
+_DISPATCHER = None
+_DISPATCHER_LOCK = threading.Lock()
+
+def get_jobs_dir():
+    """Retorna a pasta dos jobs (entradas, resultados e banco SQLite)"""
+    return _JOBS_DIR or os.path.join(get_base_drive_path(), "jobs")
+
+def job_input_dir(job_id):
+    """Pasta onde os PDFs de entrada de um job devem ser gravados antes de submit_job"""
+    path = os.path.join(get_jobs_dir(), "inputs", job_id)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+@contextmanager
+def _jobs_db():
+    """Open the jobs database (serialized: SQLite writers from many threads)."""
+    os.makedirs(get_jobs_dir(), exist_ok=True)
+    with _JOBS_DB_LOCK:
+        conn = sqlite3.connect(os.path.join(get_jobs_dir(), "jobs.sqlite"), timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, status TEXT NOT NULL, inputs TEXT NOT NULL, conversions TEXT NOT NULL,"
+                " progress TEXT NOT NULL DEFAULT '{}', result_path TEXT, error TEXT,"
+                " created REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            columns = {column[1] for column in conn.execute("PRAGMA table_info(jobs)")}
+            if 'io' not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN io TEXT NOT NULL DEFAULT '{}'")
+            if 'options' not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN options TEXT NOT NULL DEFAULT '{}'")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+def _update_job(job_id, **fields):
+    fields['updated'] = time.time()
+    assignments = ', '.join(f"{name} = ?" for name in fields)
+    with _jobs_db() as conn:
+        conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+def new_job_id():
+    """Gera o identificador de um novo job"""
+    return uuid.uuid4().hex
+
+def submit_job(job_id, input_paths, conversions, options=None):
+    """Enfileira um job já com os PDFs gravados em job_input_dir(job_id) e retorna seu id
+
+    options são os argumentos extras por conversão repassados a run_conversions.
+    """
+    now = time.time()
+    with _jobs_db() as conn:
+        conn.execute(
+            "INSERT INTO jobs (id, status, inputs, conversions, options, created, updated) VALUES (?, 'queued', ?, ?, ?, ?, ?)",
+            (job_id, json.dumps(list(input_paths)), json.dumps(list(conversions)), json.dumps(options or {}), now, now),
+        )
+    _WAKE.set()
+    return job_id
+
+def get_job(job_id):
+    """Retorna o job como dicionário (status, progresso por etapa, E/S, erro) ou None se não existir"""
+    with _jobs_db() as conn:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    if row is None:
+        return None
+    job = dict(row)
+    job['inputs'] = json.loads(job['inputs'])
+    job['conversions'] = json.loads(job['conversions'])
+    job['progress'] = json.loads(job['progress'])
+    job['io'] = json.loads(job['io'])
+    job['options'] = json.loads(job['options'])
+    return job
+
+def cancel_job(job_id):
+    """Cancela um job: se ainda estiver na fila, na hora; se estiver rodando, no próximo passo de progresso
+
+    Retorna o status do job após o pedido, ou None se o job não existir.
+    """
+    with _jobs_db() as conn:
+        row = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        if row['status'] == 'queued':
+            conn.execute("UPDATE jobs SET status = 'cancelled', updated = ? WHERE id = ?", (time.time(), job_id))
+            return 'cancelled'
+        if row['status'] != 'running':
+            return row['status']
+    _CANCELLED.add(job_id)
+    return 'running'
+
+def _job_progress(job_id):
+    """Build the progress callback of a job: records {stage: [done, total]} and honours cancellation."""
+    progress = {}
+    last_write = [0.0]
+    lock = threading.Lock()
+
+    def callback(stage, done, total):
+        if job_id in _CANCELLED:
+            raise ConversionCancelled(f"Job {job_id} cancelado")
+        with lock:
+            progress[stage] = [done, total]
+            now = time.monotonic()
+            if now - last_write[0] < JOB_PROGRESS_INTERVAL and done != total:
+                return
+            last_write[0] = now
+            snapshot = json.dumps(progress)
+        _update_job(job_id, progress=snapshot)
+
+    return callback
+
+def _run_job(job_id):
+    job = get_job(job_id)
+    io_report = {}
+    output_dir = os.path.join(get_jobs_dir(), "outputs", job_id)
+    try:
+        with progress_callback(_job_progress(job_id)), io_accounting(io_report):
+            converted_files = run_conversions(job['inputs'], job['conversions'], output_dir=output_dir, options=job['options'])
+            if job_id not in _CANCELLED and converted_files:
+                result_path = write_archive(converted_files, os.path.join(get_jobs_dir(), "results", f"{job_id}.zip"))
+        if job_id in _CANCELLED:
+            _update_job(job_id, status='cancelled')
+        elif converted_files:
+            _update_job(job_id, status='done', result_path=result_path)
+        else:
+            _update_job(job_id, status='failed', error='Nenhum arquivo foi convertido com sucesso')
+    except ConversionCancelled:
+        _update_job(job_id, status='cancelled')
+    except Exception as e:
+        logging.exception(f"Job {job_id} failed")
+        _update_job(job_id, status='failed', error=str(e))
+    finally:
+        _update_job(job_id, io=json.dumps(io_report))
+        _CANCELLED.discard(job_id)
+        shutil.rmtree(os.path.join(get_jobs_dir(), "inputs", job_id), ignore_errors=True)
+        shutil.rmtree(output_dir, ignore_errors=True)
+        _WAKE.set()
+
+def _claim_next_job():
+    """Atomically move the oldest queued job to running. Returns its id or None."""
+    with _jobs_db() as conn:
+        row = conn.execute("SELECT id FROM jobs WHERE status = 'queued' ORDER BY created LIMIT 1").fetchone()
+        if row is None:
+            return None
+        claimed = conn.execute("UPDATE jobs SET status = 'running', updated = ? WHERE id = ? AND status = 'queued'", (time.time(), row['id'])).rowcount
+        return row['id'] if claimed else None
+
+def prune_jobs(retention=None):
+    """Remove os jobs encerrados há mais de retention segundos (padrão JOB_RETENTION) e seus resultados
+
+    ZIPs em results/ mais antigos que isso e sem job correspondente também são apagados.
+    Retorna o número de jobs removidos.
+    """
+    cutoff = time.time() - (JOB_RETENTION if retention is None else retention)
+    with _jobs_db() as conn:
+        expired = conn.execute(
+            "SELECT id, result_path FROM jobs WHERE status IN ('done', 'failed', 'cancelled') AND updated < ?", (cutoff,)
+        ).fetchall()
+        conn.executemany("DELETE FROM jobs WHERE id = ?", [(row['id'],) for row in expired])
+    for row in expired:
+        if row['result_path'] and os.path.exists(row['result_path']):
+            os.remove(row['result_path'])
+
+    results_dir = os.path.join(get_jobs_dir(), "results")
+    if os.path.isdir(results_dir):
+        for entry in os.scandir(results_dir):
+            if entry.is_file() and entry.stat().st_mtime < cutoff and get_job(os.path.splitext(entry.name)[0]) is None:
+                os.remove(entry.path)
+    if expired:
+        logging.info(f"Pruned {len(expired)} finished job(s)")
+    return len(expired)
+
+def _dispatch_loop():
+    running = {}
+    last_prune = 0.0
+    while True:
+        if time.monotonic() - last_prune >= JOB_PRUNE_INTERVAL:
+            last_prune = time.monotonic()
+            try:
+                prune_jobs()
+            except Exception:
+                logging.exception("Pruning finished jobs failed")
+        for job_id, thread in list(running.items()):
+            if not thread.is_alive():
+                del running[job_id]
+        while len(running) < JOB_CONCURRENCY:
+            job_id = _claim_next_job()
+            if job_id is None:
+                break
+            logging.info(f"Starting job {job_id}")
+            running[job_id] = threading.Thread(target=_run_job, args=(job_id,), name=f"job-{job_id}", daemon=True)
+            running[job_id].start()
+        _WAKE.wait(JOB_POLL_INTERVAL)
+        _WAKE.clear()
+
+def start_dispatcher(jobs_dir=None, concurrency=None):
+    """Inicia o despachante de jobs (uma vez por processo), recolocando na fila os jobs interrompidos
+
+    Deve ser chamado só no processo que atende as requisições: com o reloader do Flask, o
+    processo que apenas observa os arquivos iniciaria um segundo despachante sobre o mesmo banco.
+    """
+    global _JOBS_DIR, JOB_CONCURRENCY, _DISPATCHER
+    if jobs_dir:
+        _JOBS_DIR = jobs_dir
+    if concurrency:
+        JOB_CONCURRENCY = max(1, int(concurrency))
+    with _DISPATCHER_LOCK:
+        if _DISPATCHER is not None:
+            return _DISPATCHER
+
+        with _jobs_db() as conn:
+            requeued = conn.execute("UPDATE jobs SET status = 'queued', updated = ? WHERE status = 'running'", (time.time(),)).rowcount
+        if requeued:
+            logging.info(f"Requeued {requeued} interrupted job(s)")
+
+        _DISPATCHER = threading.Thread(target=_dispatch_loop, name="job-dispatcher", daemon=True)
+        _DISPATCHER.start()
+        return _DISPATCHER